@@ -0,0 +1,184 @@
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy.pool import QueuePool
+
+from app.base.cache import LRUCache
+from app.base.metrics import registry, route_name
+from app.config import get_load_shedding_config, get_rate_limit_config
+from app.database import engine
+
+rate_limited = registry.counter('http_rate_limited_total', 'Requests rejected by a rate limit', ('limit', 'scope'))
+shed_requests = registry.counter('http_shed_requests_total', 'Requests shed because the database pool was saturated', ('route',))
+
+
+class MemoryRateLimitStore:
+    def __init__(self, maxsize: int = 100000):
+        self._buckets = LRUCache(maxsize)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        state = self._buckets.get(key)
+        tokens = burst if state is None else min(burst, state[0] + (now - state[1]) * rate)
+        if tokens < 1:
+            self._buckets.set(key, (tokens, now), ttl=burst / rate)
+            return (1 - tokens) / rate
+        self._buckets.set(key, (tokens - 1, now), ttl=burst / rate)
+        return 0.0
+
+
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = burst
+if state[1] then
+    tokens = math.min(burst, tonumber(state[1]) + (now - tonumber(state[2])) * rate)
+end
+local wait = 0
+if tokens < 1 then
+    wait = (1 - tokens) / rate
+else
+    tokens = tokens - 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return tostring(wait)
+"""
+
+
+class RedisRateLimitStore:
+    def __init__(self, url: str, prefix: str = 'ratelimit:'):
+        from redis.asyncio import Redis
+
+        self.prefix = prefix
+        self._redis = Redis.from_url(url)
+        self._take = self._redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        return float(await self._take(keys=[self.prefix + key], args=[rate, burst]))
+
+
+def client_key(request: Request) -> str:
+    return f'ip:{request.client.host if request.client else "-"}'
+
+
+class RateLimiter:
+    def __init__(self, store: MemoryRateLimitStore | RedisRateLimitStore, limits: dict[str, dict], enabled: bool = True):
+        self.store = store
+        self.limits = limits
+        self.enabled = enabled
+
+    async def check(self, name: str, identity: str):
+        if not self.enabled:
+            return
+        limit = self.limits[name]
+        for scope, key in (('route', f'{name}:route'), ('user', f'{name}:{identity}')):
+            rate, burst = limit[f'{scope}_rate'], limit[f'{scope}_burst']
+            if not rate:
+                continue
+            wait = await self.store.take(key, rate, burst)
+            if wait:
+                rate_limited.inc(name, scope)
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail='Too many requests, try again later!',
+                    headers={'Retry-After': str(math.ceil(wait))},
+                )
+
+    def limit(self, name: str, key=client_key):
+        async def dependency(identity: str = Depends(key)):
+            await self.check(name, identity)
+        return dependency
+
+
+class LoadShedder:
+    def __init__(self, capacity: int | None, max_queue: int, max_wait: float, pool=None):
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.pool = pool
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    def saturated(self) -> bool:
+        if self.active >= self.capacity:
+            return True
+        return self.pool is not None and self.pool.checkedout() >= self.capacity
+
+    def _shed(self, route: str):
+        shed_requests.inc(route)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Server is busy, try again later!',
+            headers={'Retry-After': str(max(1, math.ceil(self.max_wait)))},
+        )
+
+    async def _acquire(self, route: str):
+        if not self._waiters and not self.saturated():
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self._shed(route)
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.max_wait)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # _release handed us the slot just before the timeout or cancellation landed
+                self._release()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            self._shed(route)
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def admit(self, route: str = '-'):
+        if self.capacity is None:
+            yield
+            return
+        await self._acquire(route)
+        try:
+            yield
+        finally:
+            self._release()
+
+
+def create_rate_limiter() -> RateLimiter:
+    limit_config = get_rate_limit_config()
+    store = RedisRateLimitStore(limit_config['url']) if limit_config['url'] else MemoryRateLimitStore()
+    return RateLimiter(store, limit_config['limits'], limit_config['enabled'])
+
+
+def create_load_shedder() -> LoadShedder:
+    shed_config = get_load_shedding_config()
+    pool = engine.sync_engine.pool
+    if not shed_config['enabled'] or not isinstance(pool, QueuePool):
+        return LoadShedder(None, shed_config['max_queue'], shed_config['max_wait'])
+    return LoadShedder(shed_config['capacity'], shed_config['max_queue'], shed_config['max_wait'], pool)
+
+
+rate_limiter = create_rate_limiter()
+load_shedder = create_load_shedder()
+
+
+async def shed_load(request: Request):
+    async with load_shedder.admit(route_name(request.scope)):
+        yield
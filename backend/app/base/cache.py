@@ -0,0 +1,120 @@
+import pickle
+import time
+from collections import OrderedDict
+
+from app.config import get_cache_config
+
+
+class LRUCache:
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+
+    def get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        value, expires_at = item
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+    def clear(self, prefix: str | None = None):
+        if prefix is None:
+            self._data.clear()
+            return
+        for key in [key for key in self._data if key.startswith(prefix)]:
+            del self._data[key]
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCacheBackend:
+    def __init__(self, url: str, ttl: float):
+        from redis.asyncio import Redis
+
+        self.ttl = ttl
+        self._redis = Redis.from_url(url)
+
+    async def get(self, key: str):
+        raw = await self._redis.get(key)
+        return pickle.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value):
+        await self._redis.set(key, pickle.dumps(value), px=int(self.ttl * 1000))
+
+    async def delete(self, key: str):
+        await self._redis.delete(key)
+
+    async def clear(self, prefix: str):
+        async for key in self._redis.scan_iter(match=f"{prefix}*"):
+            await self._redis.delete(key)
+
+
+class EntityCache:
+    def __init__(self, local: LRUCache, shared: RedisCacheBackend | None = None):
+        self.local = local
+        self.shared = shared
+        self.shared_hits = 0
+
+    async def get(self, key: str):
+        value = self.local.get(key)
+        if value is None and self.shared is not None:
+            value = await self.shared.get(key)
+            if value is not None:
+                self.shared_hits += 1
+                self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value):
+        self.local.set(key, value)
+        if self.shared is not None:
+            await self.shared.set(key, value)
+
+    async def invalidate(self, key: str):
+        self.local.delete(key)
+        if self.shared is not None:
+            await self.shared.delete(key)
+
+    async def invalidate_prefix(self, prefix: str):
+        self.local.clear(prefix)
+        if self.shared is not None:
+            await self.shared.clear(prefix)
+
+    def stats(self) -> dict:
+        return {
+            'hits': self.local.hits + self.shared_hits,
+            'misses': self.local.misses - self.shared_hits,
+            'local_hits': self.local.hits,
+            'shared_hits': self.shared_hits,
+            'size': len(self.local),
+        }
+
+
+def create_entity_cache() -> EntityCache:
+    cache_config = get_cache_config()
+    shared = RedisCacheBackend(cache_config['url'], cache_config['ttl']) if cache_config['url'] else None
+    return EntityCache(LRUCache(cache_config['size'], cache_config['ttl']), shared)
+
+
+entity_cache = create_entity_cache()
@@ -1,73 +1,166 @@
+from functools import partial
+
 from sqlalchemy.future import select
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import update as sqlalchemy_update, delete as sqlalchemy_delete
-from app.database import async_session_maker
+from sqlalchemy import insert as sqlalchemy_insert, update as sqlalchemy_update, delete as sqlalchemy_delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.base.cache import entity_cache
+from app.base.pagination import encode_cursor, decode_cursor
+from app.database import async_session_maker, engine, session_scope, on_commit
+
+
+REPLICA = {'replica': True}
+
+
+def dialect_insert(model):
+    if engine.dialect.name == 'postgresql':
+        return postgresql_insert(model)
+    return sqlite_insert(model)
 
 
 class BaseDAO:
     model = None
+    cache_by_id = False
+
+    @classmethod
+    def _cache_key(cls, data_id) -> str:
+        return f"{cls.model.__tablename__}:{data_id}"
+
+    @classmethod
+    def _snapshot(cls, instance) -> dict:
+        return {attr.key: getattr(instance, attr.key) for attr in cls.model.__mapper__.column_attrs}
+
+    @classmethod
+    def _mark_write(cls, session, filter_by: dict):
+        session.info['has_writes'] = True
+        if not cls.cache_by_id:
+            return
+        if set(filter_by) == {'id'}:
+            on_commit(session, partial(entity_cache.invalidate, cls._cache_key(filter_by['id'])))
+        else:
+            on_commit(session, partial(entity_cache.invalidate_prefix, f"{cls.model.__tablename__}:"))
 
     @classmethod
     async def get_all(cls, **filter_by):
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = select(cls.model).filter_by(**filter_by)
-            result = await session.execute(query)
+            result = await session.execute(query, bind_arguments=REPLICA)
             return result.scalars().all()
 
     @classmethod
-    async def get_one_or_none_by_id(cls, data_id: int):
+    async def get_page(cls, limit: int, cursor: str | None = None, order_by: str = 'id', descending: bool = False, **filter_by):
+        columns = [getattr(cls.model, name) for name in dict.fromkeys((order_by, 'id'))]
+        query = select(cls.model).filter_by(**filter_by)
+        if cursor:
+            key, values = tuple_(*columns), tuple_(*decode_cursor(cursor, columns))
+            query = query.where(key < values if descending else key > values)
+        query = query.order_by(*[column.desc() if descending else column for column in columns]).limit(limit + 1)
+        async with session_scope() as session:
+            result = await session.execute(query, bind_arguments=REPLICA)
+            items = result.scalars().all()
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor([getattr(items[-1], column.key) for column in columns])
+        return items, next_cursor
+
+    @classmethod
+    async def stream_all(cls, batch_size: int = 500, order_by: str = 'id', descending: bool = False, **filter_by):
+        columns = [getattr(cls.model, name) for name in dict.fromkeys((order_by, 'id'))]
+        query = select(cls.model).filter_by(**filter_by).order_by(
+            *[column.desc() if descending else column for column in columns]
+        ).execution_options(yield_per=batch_size)
         async with async_session_maker() as session:
+            result = await session.stream_scalars(query, bind_arguments=REPLICA)
+            async for instance in result:
+                yield instance
+
+    @classmethod
+    async def get_one_or_none_by_id(cls, data_id: int):
+        async with session_scope() as session:
+            use_cache = cls.cache_by_id and not session.info.get('has_writes')
+            if use_cache:
+                cached = await entity_cache.get(cls._cache_key(data_id))
+                if cached is not None:
+                    return cls.model(**cached)
             query = select(cls.model).filter_by(id=data_id)
-            result = await session.execute(query)
-            return result.scalar_one_or_none()
+            result = await session.execute(query, bind_arguments=None if use_cache else REPLICA)
+            instance = result.scalar_one_or_none()
+            if use_cache and instance is not None:
+                await entity_cache.set(cls._cache_key(data_id), cls._snapshot(instance))
+            return instance
 
     @classmethod
     async def get_one_or_none(cls, **filter_by):
-        async with async_session_maker() as session:
+        async with session_scope() as session:
             query = select(cls.model).filter_by(**filter_by)
-            result = await session.execute(query)
+            result = await session.execute(query, bind_arguments=REPLICA)
             return result.scalar_one_or_none()
 
     @classmethod
     async def add(cls, **values):
-        async with async_session_maker() as session:
-            async with session.begin():
-                new_instance = cls.model(**values)
-                session.add(new_instance)
-                try:
-                    await session.commit()
-                except SQLAlchemyError as e:
-                    await session.rollback()
-                    raise e
-                return new_instance
+        async with session_scope() as session:
+            new_instance = cls.model(**values)
+            session.add(new_instance)
+            await session.flush()
+            cls._mark_write(session, {'id': getattr(new_instance, 'id', None)})
+            return new_instance
 
     @classmethod
     async def update(cls, filter_by, **values):
-        async with async_session_maker() as session:
-            async with session.begin():
-                query = sqlalchemy_update(cls.model).where(
-					*[getattr(cls.model, k) == v for k, v in filter_by.items()]
-				).values(**values)
-                result = await session.execute(query)
-                try:
-                    await session.commit()
-                except SQLAlchemyError as e:
-                    await session.rollback()
-                    raise e
-                return result
+        async with session_scope() as session:
+            query = sqlalchemy_update(cls.model).where(
+				*[getattr(cls.model, k) == v for k, v in filter_by.items()]
+			).values(**values)
+            result = await session.execute(query)
+            cls._mark_write(session, filter_by)
+            return result
 
     @classmethod
     async def delete(cls, delete_all: bool = False, **filter_by):
         if not delete_all and not filter_by:
             raise ValueError("Need at least one parameter to delete!")
 
-        async with async_session_maker() as session:
-            async with session.begin():
-                query = sqlalchemy_delete(cls.model).filter_by(**filter_by)
-                result = await session.execute(query)
-                try:
-                    await session.commit()
-                except SQLAlchemyError as e:
-                    await session.rollback()
-                    raise e
-                return result
+        async with session_scope() as session:
+            query = sqlalchemy_delete(cls.model).filter_by(**filter_by)
+            result = await session.execute(query)
+            cls._mark_write(session, filter_by)
+            return result
+
+    @classmethod
+    async def get_existing_ids(cls, ids: list[int], **filter_by) -> set[int]:
+        if not ids:
+            return set()
+        async with session_scope() as session:
+            query = select(cls.model.id).where(cls.model.id.in_(ids)).filter_by(**filter_by)
+            result = await session.execute(query)
+            return set(result.scalars().all())
+
+    @classmethod
+    async def add_many(cls, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        async with session_scope() as session:
+            query = sqlalchemy_insert(cls.model).returning(cls.model.id, sort_by_parameter_order=True)
+            result = await session.execute(query, rows)
+            cls._mark_write(session, {})
+            return list(result.scalars().all())
+
+    @classmethod
+    async def update_many(cls, rows: list[dict], **filter_by):
+        if not rows:
+            return
+        async with session_scope() as session:
+            query = sqlalchemy_update(cls.model).filter_by(**filter_by).execution_options(synchronize_session=None)
+            await session.execute(query, rows)
+            cls._mark_write(session, {})
+
+    @classmethod
+    async def delete_many(cls, ids: list[int], **filter_by) -> list[int]:
+        if not ids:
+            return []
+        async with session_scope() as session:
+            query = sqlalchemy_delete(cls.model).where(cls.model.id.in_(ids)).filter_by(**filter_by).returning(cls.model.id)
+            result = await session.execute(query)
+            cls._mark_write(session, {})
+            return list(result.scalars().all())
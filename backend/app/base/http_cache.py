@@ -0,0 +1,45 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()[:20]
+    return f'"{digest}"'
+
+
+def _utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def cache_headers(etag: str, last_modified: datetime | None = None) -> dict:
+    headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+    if last_modified is not None:
+        headers['Last-Modified'] = format_datetime(_utc(last_modified).replace(microsecond=0), usegmt=True)
+    return headers
+
+
+def is_not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+        return '*' in tags or etag in tags
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return _utc(last_modified).replace(microsecond=0) <= _utc(since)
+
+
+def conditional_response(request: Request, etag: str, last_modified: datetime | None, body: bytes) -> Response:
+    headers = cache_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(body, media_type='application/json', headers=headers)
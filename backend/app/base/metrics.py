@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from sqlalchemy import event
+
+from app.config import get_metrics_config
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: tuple, values: tuple) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values: dict[tuple, float] = defaultdict(float)
+
+    def inc(self, *labels, amount: float = 1.0):
+        self._values[labels] += amount
+
+    def samples(self):
+        for labels, value in sorted(self._values.items()):
+            yield f'{self.name}{_format_labels(self.labels, labels)} {value}'
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def __init__(self, name: str, help: str, collect):
+        super().__init__(name, help)
+        self.collect = collect
+
+    def samples(self):
+        yield f'{self.name} {self.collect()}'
+
+
+class Histogram(Counter):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        self._counts: dict[tuple, list[int]] = {}
+        self._sums: dict[tuple, float] = defaultdict(float)
+
+    def observe(self, value: float, *labels):
+        counts = self._counts.get(labels)
+        if counts is None:
+            counts = self._counts[labels] = [0] * (len(self.buckets) + 1)
+        counts[bisect_left(self.buckets, value)] += 1
+        self._sums[labels] += value
+
+    def samples(self):
+        for labels, counts in sorted(self._counts.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                yield f'{self.name}_bucket{_format_labels((*self.labels, "le"), (*labels, bound))} {cumulative}'
+            yield f'{self.name}_sum{_format_labels(self.labels, labels)} {self._sums[labels]}'
+            yield f'{self.name}_count{_format_labels(self.labels, labels)} {cumulative}'
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, Counter] = {}
+
+    def register(self, metric: Counter) -> Counter:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, collect) -> Gauge:
+        return self.register(Gauge(name, help, collect))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_requests = registry.counter('http_requests_total', 'HTTP requests by route and status', ('method', 'route', 'status'))
+http_latency = registry.histogram('http_request_duration_seconds', 'HTTP request latency', ('method', 'route'))
+sql_statements = registry.histogram('http_request_sql_statements', 'SQL statements executed per request', ('method', 'route'), COUNT_BUCKETS)
+sql_time = registry.histogram('http_request_sql_seconds', 'Time spent in SQL per request', ('method', 'route'))
+pool_wait = registry.histogram('http_request_pool_wait_seconds', 'Time spent waiting for pool checkouts per request', ('method', 'route'), WAIT_BUCKETS)
+slow_queries = registry.counter('db_slow_queries_total', 'Statements slower than the slow query threshold', ('fingerprint',))
+
+
+@dataclass
+class RequestStats:
+    sql_count: int = 0
+    sql_time: float = 0.0
+    pool_wait: float = 0.0
+    scope: dict | None = None
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar('request_stats', default=None)
+
+_PARAM_RE = re.compile(r"'(?:[^']|'')*'|\$\d+(?:::\w+)?|%\(\w+\)s|(?<![:\w]):\w+|\b\d+(?:\.\d+)?\b|\?")
+_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ROWS_RE = re.compile(r'\(\?\)(?:\s*,\s*\(\?\))+')
+
+
+def fingerprint(statement: str) -> tuple[str, str]:
+    normalized = _PARAM_RE.sub('?', ' '.join(statement.split()))
+    normalized = _ROWS_RE.sub('(?)', _LIST_RE.sub('(?)', normalized))
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12], normalized
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # kept on the statement's context so a failed statement cannot leave a stale start behind
+    if context is not None:
+        context.query_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, 'query_start', None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    stats = request_stats.get()
+    if stats is not None:
+        stats.sql_count += 1
+        stats.sql_time += elapsed
+    threshold = get_metrics_config()['slow_query_ms']
+    if threshold is not None and elapsed * 1000 >= threshold:
+        key, normalized = fingerprint(statement)
+        slow_queries.inc(key)
+        route = route_name(stats.scope) if stats is not None else '-'
+        logger.warning('slow query %s %.1f ms route=%s: %s', key, elapsed * 1000, route, normalized)
+
+
+def _timed_checkout(raw_connection):
+    def timed():
+        start = time.perf_counter()
+        connection = raw_connection()
+        stats = request_stats.get()
+        if stats is not None:
+            stats.pool_wait += time.perf_counter() - start
+        return connection
+    return timed
+
+
+def _pool_stat(sync_engine, name: str):
+    return lambda: getattr(sync_engine.pool, name, lambda: 0)()
+
+
+def instrument_engine(engine, name: str = 'db'):
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(sync_engine, 'after_cursor_execute', _after_cursor_execute)
+    sync_engine.raw_connection = _timed_checkout(sync_engine.raw_connection)
+    registry.gauge(f'{name}_pool_checked_out', 'Connections currently checked out of the pool', _pool_stat(sync_engine, 'checkedout'))
+    registry.gauge(f'{name}_pool_size', 'Configured pool size', _pool_stat(sync_engine, 'size'))
+    registry.gauge(f'{name}_pool_overflow', 'Connections open beyond the pool size', _pool_stat(sync_engine, 'overflow'))
+
+
+def route_name(scope: dict) -> str:
+    route = scope.get('route')
+    return getattr(route, 'path', None) or 'unmatched'
+
+
+class MetricsMiddleware:
+    def __init__(self, app, profiler=None):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        stats = RequestStats(scope=scope)
+        token = request_stats.set(stats)
+        status = {'code': 500}
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                status['code'] = message['status']
+            await send(message)
+
+        samples = self.profiler.track(asyncio.current_task()) if self.profiler else None
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            request_stats.reset(token)
+            method, route = scope['method'], route_name(scope)
+            http_requests.inc(method, route, str(status['code']))
+            http_latency.observe(elapsed, method, route)
+            sql_statements.observe(stats.sql_count, method, route)
+            sql_time.observe(stats.sql_time, method, route)
+            pool_wait.observe(stats.pool_wait, method, route)
+            if samples is not None:
+                self.profiler.finish(asyncio.current_task(), samples, elapsed, method, route)
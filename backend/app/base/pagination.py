@@ -0,0 +1,93 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import AsyncIterator, Callable, Generic, Literal, TypeVar
+
+from fastapi import HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+T = TypeVar('T')
+
+
+class SPage(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+
+
+class RBPage:
+    def __init__(
+        self,
+        limit: int | None = Query(None, ge=1, le=1000),
+        cursor: str | None = None,
+        order_by: Literal['id', 'created_at'] = 'id',
+        descending: bool = False,
+        stream: Literal['ndjson', 'json'] | None = None,
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.order_by = order_by
+        self.descending = descending
+        self.stream = stream
+
+    @property
+    def is_paginated(self) -> bool:
+        return self.limit is not None or self.cursor is not None
+
+    def to_dict(self) -> dict:
+        return {
+            'limit': self.limit or 100,
+            'cursor': self.cursor,
+            'order_by': self.order_by,
+            'descending': self.descending,
+        }
+
+
+def encode_cursor(values: list) -> str:
+    raw = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _cursor_value(value, column):
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if not isinstance(value, python_type):
+        raise TypeError(f'{column.key} must be {python_type.__name__}')
+    return value
+
+
+def decode_cursor(cursor: str, columns: list) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError(cursor)
+        return [_cursor_value(value, column) for value, column in zip(values, columns)]
+    except (ValueError, TypeError, KeyError, binascii.Error) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail='Invalid cursor!') from e
+
+
+def schema_serializer(schema: type[BaseModel]) -> Callable:
+    def serialize(row) -> str:
+        return schema.model_validate(row).model_dump_json()
+    return serialize
+
+
+async def _ndjson_lines(rows: AsyncIterator, serialize: Callable) -> AsyncIterator[str]:
+    async for row in rows:
+        yield serialize(row) + '\n'
+
+
+async def _json_array(rows: AsyncIterator, serialize: Callable) -> AsyncIterator[str]:
+    separator = '['
+    async for row in rows:
+        yield separator + serialize(row)
+        separator = ','
+    yield ']' if separator == ',' else '[]'
+
+
+def stream_response(rows: AsyncIterator, stream: Literal['ndjson', 'json'], serialize: Callable) -> StreamingResponse:
+    if stream == 'ndjson':
+        return StreamingResponse(_ndjson_lines(rows, serialize), media_type='application/x-ndjson')
+    return StreamingResponse(_json_array(rows, serialize), media_type='application/json')
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from app.config import get_metrics_config
+
+logger = logging.getLogger(__name__)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> list[str]:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return names[::-1]
+
+
+def _coroutine_stack(coro) -> list[str]:
+    names = []
+    while coro is not None:
+        frame = getattr(coro, 'cr_frame', None) or getattr(coro, 'ag_frame', None) or getattr(coro, 'gi_frame', None)
+        if frame is None:
+            break
+        names.append(_frame_name(frame))
+        coro = getattr(coro, 'cr_await', None) or getattr(coro, 'ag_await', None) or getattr(coro, 'gi_yieldfrom', None)
+    return names
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float, threshold: float, directory: str):
+        self.interval = interval
+        self.threshold = threshold
+        self.directory = directory
+        self._tasks: dict[asyncio.Task, Counter] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread_id: int | None = None
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def track(self, task: asyncio.Task) -> Counter:
+        samples = Counter()
+        with self._lock:
+            self._tasks[task] = samples
+        return samples
+
+    def finish(self, task: asyncio.Task, samples: Counter, elapsed: float, method: str, route: str):
+        with self._lock:
+            self._tasks.pop(task, None)
+        if elapsed * 1000 >= self.threshold and samples:
+            self._dump(samples, elapsed, method, route)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self):
+        current = asyncio.current_task(self._loop)
+        frame = sys._current_frames().get(self._loop_thread_id)
+        with self._lock:
+            tasks = list(self._tasks.items())
+        for task, samples in tasks:
+            if task is current and frame is not None:
+                stack = _thread_stack(frame)
+            else:
+                stack = _coroutine_stack(task.get_coro()) + ['[awaiting]']
+            samples[';'.join(stack)] += 1
+
+    def _dump(self, samples: Counter, elapsed: float, method: str, route: str):
+        os.makedirs(self.directory, exist_ok=True)
+        name = re.sub(r'[^\w.-]+', '_', f'{method}{route}').strip('_')
+        path = os.path.join(self.directory, f'{time.strftime("%Y%m%d-%H%M%S")}-{int(elapsed * 1000)}ms-{name}.folded')
+        with open(path, 'w') as f:
+            f.writelines(f'{stack} {count}\n' for stack, count in samples.most_common())
+        logger.warning('slow request %s %s %.1f ms, profile written to %s', method, route, elapsed * 1000, path)
+
+
+def create_profiler() -> SamplingProfiler | None:
+    metrics_config = get_metrics_config()
+    if metrics_config['profile_slow_request_ms'] is None:
+        return None
+    return SamplingProfiler(
+        metrics_config['profile_interval_ms'] / 1000,
+        metrics_config['profile_slow_request_ms'],
+        metrics_config['profile_dir'],
+    )
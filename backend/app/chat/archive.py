@@ -0,0 +1,90 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from app.base.metrics import registry
+from app.chat.dao import MessageSegmentDAO
+from app.config import get_message_archive_config
+from app.database import dispose_engines
+from app.jobs.queue import job_queue
+from app.products.models import Product  # noqa: F401 -- registers the mapper User.products needs when run as a script
+
+logger = logging.getLogger(__name__)
+
+archived_messages = registry.counter('chat_archived_messages_total', 'Messages moved from the hot table into archive segments')
+
+
+class MessageArchiver:
+    def __init__(self, enabled: bool, max_age: timedelta, unread_max_age: timedelta, interval: float, batch_size: int, segment_size: int):
+        self.enabled = enabled
+        self.max_age = max_age
+        self.unread_max_age = unread_max_age
+        self.interval = interval
+        self.batch_size = batch_size
+        self.segment_size = segment_size
+        self._task: asyncio.Task | None = None
+
+    async def archive_batch(self) -> int:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        moved = await MessageSegmentDAO.archive(now - self.max_age, now - self.unread_max_age, self.batch_size, self.segment_size)
+        archived_messages.inc(amount=moved)
+        return moved
+
+    async def _schedule(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await job_queue.enqueue('chat.archive_messages')
+            except Exception as e:
+                logger.warning('scheduling message archival failed: %s', e)
+
+    async def start(self):
+        if self.enabled:
+            self._task = asyncio.create_task(self._schedule())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+
+def create_message_archiver() -> MessageArchiver:
+    archive_config = get_message_archive_config()
+    return MessageArchiver(
+        archive_config['enabled'], timedelta(days=archive_config['after_days']),
+        timedelta(days=archive_config['unread_after_days']), archive_config['interval'],
+        archive_config['batch_size'], archive_config['segment_size'],
+    )
+
+
+message_archiver = create_message_archiver()
+
+
+@job_queue.handler('chat.archive_messages')
+async def archive_messages():
+    if await message_archiver.archive_batch() >= message_archiver.batch_size:
+        await job_queue.enqueue('chat.archive_messages')
+
+
+async def main(args):
+    if args.after_days is not None:
+        message_archiver.max_age = timedelta(days=args.after_days)
+    if args.unread_after_days is not None:
+        message_archiver.unread_max_age = timedelta(days=args.unread_after_days)
+    total = 0
+    while True:
+        moved = await message_archiver.archive_batch()
+        total += moved
+        if moved < message_archiver.batch_size:
+            break
+    print(f'archived {total} messages older than {message_archiver.max_age}')
+    await dispose_engines()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Move old chat messages into compressed archive segments')
+    parser.add_argument('--after-days', type=float, help='override CHAT_ARCHIVE_AFTER_DAYS')
+    parser.add_argument('--unread-after-days', type=float, help='override CHAT_ARCHIVE_UNREAD_AFTER_DAYS')
+    asyncio.run(main(parser.parse_args()))
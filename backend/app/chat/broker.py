@@ -0,0 +1,96 @@
+import asyncio
+import json
+from collections import defaultdict
+
+from app.config import get_broker_config
+
+
+class InProcessBroker:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = defaultdict(set)
+
+    def subscribe(self, *channels: str) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        for channel in channels:
+            self._subscribers[channel].add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue, *channels: str):
+        for channel in channels:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is None:
+                continue
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[channel]
+
+    def deliver(self, channel: str, event: dict):
+        for queue in self._subscribers.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def publish(self, channels: list[str], event: dict):
+        for channel in channels:
+            self.deliver(channel, event)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+
+class RedisBroker(InProcessBroker):
+    def __init__(self, url: str, queue_size: int, prefix: str = 'chat:'):
+        from redis.asyncio import Redis
+
+        super().__init__(queue_size)
+        self.prefix = prefix
+        self._redis = Redis.from_url(url)
+        self._listener: asyncio.Task | None = None
+
+    async def publish(self, channels: list[str], event: dict):
+        payload = json.dumps(event)
+        for channel in channels:
+            await self._redis.publish(self.prefix + channel, payload)
+
+    async def _listen(self):
+        pubsub = self._redis.pubsub()
+        await pubsub.psubscribe(self.prefix + '*')
+        async for message in pubsub.listen():
+            if message['type'] != 'pmessage':
+                continue
+            channel = message['channel'].decode()[len(self.prefix):]
+            self.deliver(channel, json.loads(message['data']))
+
+    async def start(self):
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        await self._redis.aclose()
+
+
+def supplier_channel(supplier_id: int) -> str:
+    return f'supplier:{supplier_id}'
+
+
+def consumer_channel(consumer_id: int) -> str:
+    return f'consumer:{consumer_id}'
+
+
+def chat_channel(chat_id: int) -> str:
+    return f'chat:{chat_id}'
+
+
+def create_broker() -> InProcessBroker:
+    broker_config = get_broker_config()
+    if broker_config['url']:
+        return RedisBroker(broker_config['url'], broker_config['queue_size'])
+    return InProcessBroker(broker_config['queue_size'])
+
+
+broker = create_broker()
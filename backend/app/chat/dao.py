@@ -1,10 +1,335 @@
+import json
+import zlib
+from collections import Counter
+from datetime import datetime, timezone
+from itertools import groupby
+from operator import attrgetter
+
+from sqlalchemy import and_, bindparam, case, func, or_, select, tuple_, delete as sqlalchemy_delete, insert as sqlalchemy_insert, update as sqlalchemy_update
+from sqlalchemy.orm import aliased
+
 from app.base.dao import BaseDAO
-from app.chat.models import Chat, Message
+from app.base.pagination import encode_cursor, decode_cursor
+from app.chat.models import Chat, Message, MessageSegment
+from app.dashboard.dao import SupplierDashboardDAO
+from app.database import engine, session_scope
+from app.users.models import User
+
+READ_COLUMNS = {'supplier': Chat.supplier_last_read_id, 'consumer': Chat.consumer_last_read_id}
+SEGMENT_BOUNDS = {
+    'id': (MessageSegment.first_id, MessageSegment.last_id),
+    'created_at': (MessageSegment.first_created_at, MessageSegment.last_created_at),
+}
+
+
+def encode_segment(messages: list[Message]) -> bytes:
+    rows = [[m.id, m.sender_id, m.content, m.created_at.isoformat(), m.updated_at.isoformat()] for m in messages]
+    return zlib.compress(json.dumps(rows, separators=(',', ':')).encode())
+
+
+def decode_segment(segment: MessageSegment) -> list[Message]:
+    return [
+        Message(
+            id=id, chat_id=segment.chat_id, sender_id=sender_id, content=content,
+            created_at=datetime.fromisoformat(created_at), updated_at=datetime.fromisoformat(updated_at),
+        )
+        for id, sender_id, content, created_at, updated_at in json.loads(zlib.decompress(segment.data))
+    ]
+
+
+def message_key(order_by: str):
+    names = tuple(dict.fromkeys((order_by, 'id')))
+    return lambda message: tuple(getattr(message, name) for name in names)
+
+
+async def merge_streams(first, second, key, descending: bool = False):
+    left, right = await anext(first, None), await anext(second, None)
+    while left is not None and right is not None:
+        if key(right) > key(left) if descending else key(right) < key(left):
+            yield right
+            right = await anext(second, None)
+        else:
+            yield left
+            left = await anext(first, None)
+    while left is not None:
+        yield left
+        left = await anext(first, None)
+    while right is not None:
+        yield right
+        right = await anext(second, None)
 
 
 class ChatDAO(BaseDAO):
     model = Chat
 
+    @classmethod
+    async def get_inbox(cls, side: str, party_id: int, limit: int | None = None, cursor: str | None = None):
+        last_message = aliased(Message)
+        unread_message = aliased(Message)
+        if side == 'supplier':
+            counterparty_id, mine, theirs = Chat.consumer_id, Chat.supplier_last_read_id, Chat.consumer_last_read_id
+            from_counterparty = unread_message.sender_id == Chat.consumer_id
+        else:
+            counterparty_id, mine, theirs = Chat.supplier_id, Chat.consumer_last_read_id, Chat.supplier_last_read_id
+            from_counterparty = unread_message.sender_id != Chat.consumer_id
+
+        unread_count = select(func.count()).select_from(unread_message).where(
+            unread_message.chat_id == Chat.id, unread_message.id > mine, from_counterparty
+        ).correlate(Chat).scalar_subquery()
+        query = (
+            select(Chat, User, last_message, unread_count.label('unread_count'), theirs.label('counterparty_last_read_id'))
+            .join(User, User.id == counterparty_id)
+            .outerjoin(last_message, last_message.id == Chat.last_message_id)
+            .where(getattr(Chat, f'{side}_id') == party_id)
+        )
+        if cursor:
+            key = [Chat.last_message_id, Chat.id]
+            query = query.where(tuple_(*key) < tuple_(*decode_cursor(cursor, key)))
+        query = query.order_by(Chat.last_message_id.desc(), Chat.id.desc())
+        if limit is not None:
+            query = query.limit(limit + 1)
+
+        async with session_scope() as session:
+            rows = (await session.execute(query)).all()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor([rows[-1].Chat.last_message_id, rows[-1].Chat.id])
+        items = [
+            {
+                'id': row.Chat.id,
+                'supplier_id': row.Chat.supplier_id,
+                'consumer_id': row.Chat.consumer_id,
+                'counterparty_id': row.User.id,
+                'counterparty_name': ' '.join(filter(None, [row.User.first_name, row.User.last_name])),
+                'last_message': row[2],
+                'unread_count': row.unread_count,
+                'counterparty_last_read_id': row.counterparty_last_read_id,
+            }
+            for row in rows
+        ]
+        return items, next_cursor
+
+    @classmethod
+    async def mark_read(cls, chat_id: int, side: str, message_id: int | None = None) -> int | None:
+        column = READ_COLUMNS[side]
+        if message_id is None:
+            message_id = cls.model.last_message_id
+        else:
+            message_id = case((cls.model.last_message_id < message_id, cls.model.last_message_id), else_=message_id)
+        query = sqlalchemy_update(cls.model).where(cls.model.id == chat_id, column < message_id).values({column: message_id}).returning(column)
+        async with session_scope() as session:
+            result = await session.execute(query)
+            cls._mark_write(session, {'id': chat_id})
+            return result.scalar_one_or_none()
+
 
 class MessageDAO(BaseDAO):
     model = Message
+
+    @classmethod
+    async def get_since(cls, chat_id: int, after_id: int | None = None, since: datetime | None = None, limit: int = 100):
+        query = select(cls.model).where(cls.model.chat_id == chat_id)
+        if after_id is not None:
+            query = query.where(cls.model.id > after_id)
+        if since is not None:
+            if since.tzinfo is not None:
+                since = since.astimezone(timezone.utc).replace(tzinfo=None)
+            query = query.where(cls.model.created_at > since)
+        query = query.order_by(cls.model.id).limit(limit)
+        async with session_scope() as session:
+            result = await session.execute(query)
+            messages = list(result.scalars().all())
+        after = (after_id,) if after_id is not None else None
+        archived = await MessageSegmentDAO.load(chat_id, after=after, limit=limit, since=since)
+        if not archived:
+            return messages
+        return sorted(archived + messages, key=attrgetter('id'))[:limit]
+
+    @classmethod
+    async def get_all(cls, **filter_by):
+        messages = await super().get_all(**filter_by)
+        if set(filter_by) != {'chat_id'}:
+            return messages
+        archived = await MessageSegmentDAO.load(filter_by['chat_id'])
+        return sorted([*archived, *messages], key=attrgetter('id'))
+
+    @classmethod
+    async def get_page(cls, limit: int, cursor: str | None = None, order_by: str = 'id', descending: bool = False, **filter_by):
+        items, next_cursor = await super().get_page(limit, cursor, order_by, descending, **filter_by)
+        if set(filter_by) != {'chat_id'}:
+            return items, next_cursor
+        key = message_key(order_by)
+        after = tuple(decode_cursor(cursor, [getattr(cls.model, name) for name in dict.fromkeys((order_by, 'id'))])) if cursor else None
+        until = key(items[-1]) if next_cursor else None
+        archived = await MessageSegmentDAO.load(filter_by['chat_id'], order_by, descending, after, until, limit + 1)
+        if not archived:
+            return items, next_cursor
+        merged = sorted([*archived, *items], key=key, reverse=descending)
+        items = merged[:limit]
+        if next_cursor or len(merged) > limit:
+            next_cursor = encode_cursor(list(key(items[-1])))
+        return items, next_cursor
+
+    @classmethod
+    async def stream_all(cls, batch_size: int = 500, order_by: str = 'id', descending: bool = False, **filter_by):
+        hot = super().stream_all(batch_size, order_by, descending, **filter_by)
+        if set(filter_by) != {'chat_id'}:
+            async for message in hot:
+                yield message
+            return
+        archived = MessageSegmentDAO.stream(filter_by['chat_id'], order_by, descending)
+        async for message in merge_streams(archived, hot, message_key(order_by), descending):
+            yield message
+
+    @classmethod
+    async def _touch_chats(cls, session, messages: list[Message]):
+        last_ids, counts = {}, Counter(message.chat_id for message in messages)
+        for message in messages:
+            last_ids[message.chat_id] = max(message.id, last_ids.get(message.chat_id, 0))
+        chats = Chat.__table__
+        message_id = bindparam('touched_message_id')
+        query = sqlalchemy_update(chats).where(chats.c.id == bindparam('touched_chat_id')).values(
+            last_message_id=case((chats.c.last_message_id < message_id, message_id), else_=chats.c.last_message_id),
+            message_count=chats.c.message_count + bindparam('touched_count'),
+        )
+        await session.execute(query, [
+            {'touched_chat_id': chat_id, 'touched_message_id': last_ids[chat_id], 'touched_count': counts[chat_id]}
+            for chat_id in sorted(counts)
+        ])
+        deltas = {}
+        for chat_id, supplier_id in (await session.execute(select(chats.c.id, chats.c.supplier_id).where(chats.c.id.in_(counts)))).all():
+            if supplier_id is not None:
+                deltas.setdefault(supplier_id, {'message_count': 0})['message_count'] += counts[chat_id]
+        await SupplierDashboardDAO.adjust(session, deltas)
+
+    @classmethod
+    async def add(cls, **values):
+        async with session_scope() as session:
+            new_instance = cls.model(**values)
+            session.add(new_instance)
+            await session.flush()
+            await cls._touch_chats(session, [new_instance])
+            cls._mark_write(session, {'id': new_instance.id})
+            return new_instance
+
+    @classmethod
+    async def insert_many(cls, rows: list[dict]) -> list[Message]:
+        if not rows:
+            return []
+        async with session_scope() as session:
+            query = sqlalchemy_insert(cls.model).returning(cls.model, sort_by_parameter_order=True)
+            messages = list((await session.execute(query, rows)).scalars().all())
+            await cls._touch_chats(session, messages)
+            cls._mark_write(session, {})
+            return messages
+
+    @classmethod
+    async def add_many(cls, rows: list[dict]) -> list[int]:
+        return [message.id for message in await cls.insert_many(rows)]
+
+
+class MessageSegmentDAO(BaseDAO):
+    model = MessageSegment
+
+    @classmethod
+    async def archive(cls, before: datetime, unread_before: datetime, batch_size: int, segment_size: int) -> int:
+        query = select(Message).join(Chat, Chat.id == Message.chat_id).where(
+            Message.created_at < before,
+            Message.id < Chat.last_message_id,
+            or_(
+                Message.created_at < unread_before,
+                and_(Message.id <= Chat.supplier_last_read_id, Message.id <= Chat.consumer_last_read_id),
+            ),
+        ).order_by(Message.chat_id, Message.id).limit(batch_size)
+        if engine.dialect.name == 'postgresql':
+            query = query.with_for_update(of=Message, skip_locked=True)
+        async with session_scope() as session:
+            messages = list((await session.execute(query)).scalars().all())
+            if not messages:
+                return 0
+            segments = []
+            for chat_id, chat_messages in groupby(messages, key=attrgetter('chat_id')):
+                chat_messages = list(chat_messages)
+                for start in range(0, len(chat_messages), segment_size):
+                    chunk = chat_messages[start:start + segment_size]
+                    created = [message.created_at for message in chunk]
+                    segments.append({
+                        'chat_id': chat_id,
+                        'first_id': chunk[0].id,
+                        'last_id': chunk[-1].id,
+                        'first_created_at': min(created),
+                        'last_created_at': max(created),
+                        'count': len(chunk),
+                        'data': encode_segment(chunk),
+                    })
+            await session.execute(sqlalchemy_insert(cls.model), segments)
+            query = sqlalchemy_delete(Message).where(Message.id.in_([message.id for message in messages]))
+            await session.execute(query.execution_options(synchronize_session=False))
+            cls._mark_write(session, {})
+            return len(messages)
+
+    @classmethod
+    async def load(cls, chat_id: int, order_by: str = 'id', descending: bool = False, after: tuple | None = None,
+                   until: tuple | None = None, limit: int | None = None, since: datetime | None = None) -> list[Message]:
+        first, last = SEGMENT_BOUNDS[order_by]
+        query = select(cls.model.id, first.label('first'), last.label('last'), cls.model.count).where(cls.model.chat_id == chat_id)
+        if after is not None:
+            query = query.where(first <= after[0] if descending else last >= after[0])
+        if until is not None:
+            query = query.where(last >= until[0] if descending else first <= until[0])
+        if since is not None:
+            query = query.where(cls.model.last_created_at > since)
+        query = query.order_by(last.desc() if descending else first)
+        async with session_scope() as session:
+            pending = list((await session.execute(query)).all())
+        key = message_key(order_by)
+
+        def wanted(message: Message) -> bool:
+            value = key(message)
+            if after is not None and (value >= after if descending else value <= after):
+                return False
+            if until is not None and (value < until if descending else value > until):
+                return False
+            return since is None or message.created_at > since
+
+        def reachable(segment, bound: tuple) -> bool:
+            return segment.last >= bound[0] if descending else segment.first <= bound[0]
+
+        messages = []
+        while pending:
+            batch, count = [], 0
+            while pending and (not batch or limit is None or count < limit - len(messages)):
+                segment = pending.pop(0)
+                batch.append(segment.id)
+                count += segment.count
+            async with session_scope() as session:
+                result = await session.execute(select(cls.model).where(cls.model.id.in_(batch)))
+                for segment in result.scalars().all():
+                    messages.extend(filter(wanted, decode_segment(segment)))
+            messages.sort(key=key, reverse=descending)
+            if limit is not None and len(messages) >= limit and not (pending and reachable(pending[0], key(messages[limit - 1]))):
+                break
+        return messages[:limit]
+
+    @classmethod
+    async def stream(cls, chat_id: int, order_by: str = 'id', descending: bool = False):
+        first, last = SEGMENT_BOUNDS[order_by]
+        bound = last if descending else first
+        query = select(cls.model).where(cls.model.chat_id == chat_id).order_by(bound.desc() if descending else bound)
+        key = message_key(order_by)
+        pending = []
+        async with session_scope() as session:
+            segments = (await session.stream_scalars(query.execution_options(yield_per=10)))
+            async for segment in segments:
+                # segments can overlap, so only messages strictly before this segment's bound are final
+                edge = getattr(segment, bound.key)
+                pending.sort(key=key, reverse=descending)
+                ready = 0
+                while ready < len(pending) and (key(pending[ready])[0] > edge if descending else key(pending[ready])[0] < edge):
+                    ready += 1
+                for message in pending[:ready]:
+                    yield message
+                pending = [*pending[ready:], *decode_segment(segment)]
+        for message in sorted(pending, key=key, reverse=descending):
+            yield message
@@ -1,18 +1,34 @@
-from sqlalchemy import Column, Integer, ForeignKey, VARCHAR
+from sqlalchemy import Column, Integer, ForeignKey, VARCHAR, Index, DateTime, LargeBinary, text
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 
 class Chat(Base):
+    __table_args__ = (
+        Index('ix_chats_supplier_id_consumer_id', 'supplier_id', 'consumer_id'),
+        Index('ix_chats_consumer_id', 'consumer_id'),
+        Index('ix_chats_supplier_id_last_message_id', 'supplier_id', 'last_message_id', 'id'),
+        Index('ix_chats_consumer_id_last_message_id', 'consumer_id', 'last_message_id', 'id'),
+        Index('ix_chats_supplier_id_message_count', 'supplier_id', 'message_count', 'id'),
+    )
+
     id = Column(Integer, primary_key=True)
     supplier_id = Column(Integer, ForeignKey('users.id'))
     consumer_id = Column(Integer, ForeignKey('users.id'))
+    supplier_last_read_id = Column(Integer, nullable=False, default=0, server_default=text('0'))
+    consumer_last_read_id = Column(Integer, nullable=False, default=0, server_default=text('0'))
+    last_message_id = Column(Integer, nullable=False, default=0, server_default=text('0'))
+    message_count = Column(Integer, nullable=False, default=0, server_default=text('0'))
 
     supplier = relationship("User", foreign_keys=[supplier_id], backref="supplier_chats")
     consumer = relationship("User", foreign_keys=[consumer_id], backref="consumer_chats")
 
 
 class Message(Base):
+    __table_args__ = (
+        Index('ix_messages_chat_id_id', 'chat_id', 'id'),
+    )
+
     id = Column(Integer, primary_key=True)
     chat_id = Column(Integer, ForeignKey('chats.id'))
     sender_id = Column(Integer, ForeignKey('users.id'))
@@ -20,3 +36,19 @@ class Message(Base):
 
     chat = relationship("Chat", foreign_keys=[chat_id], backref="messages")
     sender = relationship("User", foreign_keys=[sender_id], backref="send_messages")
+
+
+class MessageSegment(Base):
+    __table_args__ = (
+        Index('ix_messagesegments_chat_id_last_id', 'chat_id', 'last_id'),
+        Index('ix_messagesegments_chat_id_first_id', 'chat_id', 'first_id'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    chat_id = Column(Integer, ForeignKey('chats.id'), nullable=False)
+    first_id = Column(Integer, nullable=False)
+    last_id = Column(Integer, nullable=False)
+    first_created_at = Column(DateTime, nullable=False)
+    last_created_at = Column(DateTime, nullable=False)
+    count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from fastapi import Query
+
+
+class RBMessageSync:
+    def __init__(
+        self,
+        after_id: int | None = Query(None, ge=0),
+        since: datetime | None = None,
+        wait: float | None = Query(None, gt=0, le=60),
+    ):
+        self.after_id = after_id
+        self.since = since
+        self.wait = wait
+
+    @property
+    def is_sync(self) -> bool:
+        return self.after_id is not None or self.since is not None or self.wait is not None
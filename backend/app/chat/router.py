@@ -1,12 +1,28 @@
-from fastapi import APIRouter, Depends
+import asyncio
+from functools import partial
+
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.base.pagination import RBPage, SPage, stream_response, schema_serializer
+from app.chat.broker import broker, supplier_channel, consumer_channel, chat_channel
 from app.chat.dao import ChatDAO, MessageDAO
-from app.users.dependecies import get_current_user
-from app.users.models import User
+from app.chat.rb import RBMessageSync
+from app.chat.schemas import SChat, SMessage, SInboxChat
+from app.chat.writer import message_writer
+from app.database import after_commit, get_session
+from app.users.dependecies import get_current_principal, decode_token
+from app.users.schemas import SUserClaims
 
 router = APIRouter(prefix="/chat", tags=["Chat endpoints"])
 
+def chat_side(current_user: SUserClaims) -> tuple[str, int]:
+    if current_user.is_consumer:
+        return 'consumer', current_user.id
+    return 'supplier', current_user.supplier_owner_id or current_user.id
+
 @router.get("/")
-async def get_all_chats(current_user: User = Depends(get_current_user)):
+async def get_all_chats(current_user: SUserClaims = Depends(get_current_principal)) -> list[SChat]:
     if current_user.is_consumer:
         consumer_id = current_user.id
         return await ChatDAO.get_all(consumer_id=consumer_id)
@@ -16,12 +32,52 @@ async def get_all_chats(current_user: User = Depends(get_current_user)):
         supplier_id = current_user.supplier_owner_id
     return await ChatDAO.get_all(supplier_id=supplier_id)
 
+@router.get("/inbox/")
+async def get_inbox(limit: int | None = Query(None, ge=1, le=1000), cursor: str | None = None, current_user: SUserClaims = Depends(get_current_principal)) -> list[SInboxChat] | SPage[SInboxChat]:
+    side, party_id = chat_side(current_user)
+    items, next_cursor = await ChatDAO.get_inbox(side, party_id, limit, cursor)
+    if limit is None and cursor is None:
+        return items
+    return SPage[SInboxChat](items=items, next_cursor=next_cursor)
+
+async def sync_messages(chat_id: int, sync: RBMessageSync, limit: int, session: AsyncSession) -> list[SMessage]:
+    channel = chat_channel(chat_id)
+    queue = broker.subscribe(channel) if sync.wait else None
+    try:
+        messages = await MessageDAO.get_since(chat_id, sync.after_id, sync.since, limit)
+        if messages or queue is None:
+            return messages
+        await session.commit()
+        try:
+            await asyncio.wait_for(queue.get(), timeout=sync.wait)
+        except asyncio.TimeoutError:
+            pass
+        return await MessageDAO.get_since(chat_id, sync.after_id, sync.since, limit)
+    finally:
+        if queue is not None:
+            broker.unsubscribe(queue, channel)
+
 @router.get("/{chat_id}/")
-async def get_chat_contents(chat_id: int, current_user: User = Depends(get_current_user)):
+async def get_chat_contents(chat_id: int, page: RBPage = Depends(), sync: RBMessageSync = Depends(), session: AsyncSession = Depends(get_session, scope="function"), current_user: SUserClaims = Depends(get_current_principal)) -> list[SMessage] | SPage[SMessage] | dict:
+    chat = await ChatDAO.get_one_or_none_by_id(chat_id)
+    if not chat:
+        return {'message': 'Chat not found'}
+    side, party_id = chat_side(current_user)
+    if getattr(chat, f'{side}_id') != party_id:
+        return {'message': 'Access denied'}
+
+    if sync.is_sync:
+        return await sync_messages(chat_id, sync, page.limit or 100, session)
+    if page.stream:
+        messages = MessageDAO.stream_all(order_by=page.order_by, descending=page.descending, chat_id=chat_id)
+        return stream_response(messages, page.stream, schema_serializer(SMessage))
+    if page.is_paginated:
+        items, next_cursor = await MessageDAO.get_page(**page.to_dict(), chat_id=chat_id)
+        return SPage[SMessage](items=items, next_cursor=next_cursor)
     return await MessageDAO.get_all(chat_id=chat_id)
 
 @router.post("/{chat_id}/")
-async def send_message(chat_id: int, content: str, current_user: User = Depends(get_current_user)):
+async def send_message(chat_id: int, content: str, session: AsyncSession = Depends(get_session, scope="function"), current_user: SUserClaims = Depends(get_current_principal)) -> dict:
     chat = await ChatDAO.get_one_or_none_by_id(chat_id)
     if not chat:
         return {'message': 'Chat not found'}
@@ -29,7 +85,66 @@ async def send_message(chat_id: int, content: str, current_user: User = Depends(
     if current_user.id not in [chat.supplier_id, chat.consumer_id]:
         return {'message': 'Access denied'}
 
-    result = await MessageDAO.add(chat_id=chat_id, sender_id=current_user.id, content=content)
+    await session.commit()
+    batched = message_writer.batching
+    result = await message_writer.submit(chat_id=chat_id, sender_id=current_user.id, content=content)
     if result:
+        event = {'type': 'message', 'message': SMessage.model_validate(result).model_dump(mode='json')}
+        channels = [supplier_channel(chat.supplier_id), consumer_channel(chat.consumer_id), chat_channel(chat_id)]
+        if batched:
+            await broker.publish(channels, event)
+        else:
+            await after_commit(partial(broker.publish, channels, event))
         return {'message': 'Message sent successfully!'}
     return {'message': 'Failed to send message'}
+
+@router.put("/{chat_id}/read/")
+async def mark_chat_read(chat_id: int, message_id: int | None = Query(None, ge=1), current_user: SUserClaims = Depends(get_current_principal)) -> dict:
+    chat = await ChatDAO.get_one_or_none_by_id(chat_id)
+    if not chat:
+        return {'message': 'Chat not found'}
+    side, party_id = chat_side(current_user)
+    if getattr(chat, f'{side}_id') != party_id:
+        return {'message': 'Access denied'}
+
+    last_read_id = await ChatDAO.mark_read(chat_id, side, message_id)
+    if last_read_id is None:
+        return {'message': 'Already read', 'last_read_id': getattr(chat, f'{side}_last_read_id')}
+    event = {'type': 'read', 'chat_id': chat_id, 'reader': side, 'last_read_id': last_read_id}
+    channel = consumer_channel(chat.consumer_id) if side == 'supplier' else supplier_channel(chat.supplier_id)
+    await after_commit(partial(broker.publish, [channel], event))
+    return {'message': 'Chat marked as read', 'last_read_id': last_read_id}
+
+async def forward_events(websocket: WebSocket, queue: asyncio.Queue):
+    while True:
+        await websocket.send_json(await queue.get())
+
+@router.websocket("/ws/")
+async def chat_events(websocket: WebSocket, session: AsyncSession = Depends(get_session, scope="function")):
+    try:
+        payload = decode_token(websocket.cookies.get('users_access_token') or '')
+        current_user = await get_current_principal(payload)
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await session.close()
+
+    if current_user.is_consumer:
+        channels = [consumer_channel(current_user.id)]
+    else:
+        supplier_id = current_user.id
+        if current_user.is_supplier_manager or current_user.is_supplier_repr:
+            supplier_id = current_user.supplier_owner_id
+        channels = [supplier_channel(supplier_id)]
+
+    queue = broker.subscribe(*channels)
+    await websocket.accept()
+    forwarder = asyncio.create_task(forward_events(websocket, queue))
+    try:
+        while True:
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        forwarder.cancel()
+        broker.unsubscribe(queue, *channels)
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from pydantic import BaseModel, ConfigDict
+
+
+class SChat(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    supplier_id: int
+    consumer_id: int
+    supplier_last_read_id: int = 0
+    consumer_last_read_id: int = 0
+    last_message_id: int = 0
+    message_count: int = 0
+    created_at: datetime | None = None
+
+
+class SMessage(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    chat_id: int
+    sender_id: int
+    content: str | None = None
+    created_at: datetime | None = None
+
+
+class SInboxChat(BaseModel):
+    id: int
+    supplier_id: int
+    consumer_id: int
+    counterparty_id: int
+    counterparty_name: str
+    last_message: SMessage | None = None
+    unread_count: int
+    counterparty_last_read_id: int
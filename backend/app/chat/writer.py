@@ -0,0 +1,90 @@
+import asyncio
+import logging
+
+from app.base.metrics import COUNT_BUCKETS, registry
+from app.chat.dao import MessageDAO
+from app.chat.models import Message
+from app.config import get_message_writer_config
+
+logger = logging.getLogger(__name__)
+
+batch_sizes = registry.histogram(
+    'chat_message_write_batch_size', 'Messages committed together by the group-commit writer',
+    buckets=(*COUNT_BUCKETS, 89, 144, 233, 377, 610),
+)
+
+
+class MessageWriter:
+    def __init__(self, enabled: bool, window: float, batch_size: int):
+        self.enabled = enabled
+        self.window = window
+        self.batch_size = batch_size
+        self._pending: list[tuple[dict, asyncio.Future]] = []
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def batching(self) -> bool:
+        return self._task is not None
+
+    async def submit(self, **values) -> Message:
+        if not self.batching:
+            return (await MessageDAO.insert_many([values]))[0]
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((values, future))
+        self._wakeup.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                if self._stopping:
+                    return
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                if self.window and not self._stopping:
+                    await asyncio.sleep(self.window)
+            batch = self._pending[:self.batch_size]
+            del self._pending[:self.batch_size]
+            await self._write(batch)
+
+    async def _write(self, batch: list[tuple[dict, asyncio.Future]]):
+        try:
+            messages = await MessageDAO.insert_many([values for values, _ in batch])
+        except Exception as e:
+            if len(batch) > 1:
+                logger.warning('batch of %s messages failed, retrying one by one: %s', len(batch), e)
+                for item in batch:
+                    await self._write([item])
+                return
+            future = batch[0][1]
+            if not future.done():
+                future.set_exception(e)
+            return
+        batch_sizes.observe(len(batch))
+        for (_, future), message in zip(batch, messages):
+            if not future.done():
+                future.set_result(message)
+
+    async def start(self):
+        if self.enabled:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await task
+
+
+def create_message_writer() -> MessageWriter:
+    writer_config = get_message_writer_config()
+    return MessageWriter(writer_config['enabled'], writer_config['window_ms'] / 1000, writer_config['batch_size'])
+
+
+message_writer = create_message_writer()
@@ -8,8 +8,77 @@ class Settings(BaseSettings):
     DB_NAME: str = 'scp-database'
     DB_USER: str = 'postgres'
     DB_PASSWORD: str = 'password'
+    DATABASE_URL: str | None = None
+    DATABASE_REPLICA_URL: str | None = None
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_RECYCLE: int = 1800
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_POOL_WARMUP: bool = True
     SECRET_KEY: str = 'MY_SECRET_KEY'
     ALGORITHM: str = 'HS256'
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    TOKEN_CLAIMS: bool = True
+    HASH_EXECUTOR: str = 'thread'
+    HASH_WORKERS: int = min(4, os.cpu_count() or 1)
+    HASH_QUEUE_LIMIT: int = 64
+    ENTITY_CACHE_SIZE: int = 10000
+    ENTITY_CACHE_TTL: float = 30.0
+    ENTITY_CACHE_URL: str | None = None
+    LINK_ACCESS_CACHE_SIZE: int = 10000
+    LINK_ACCESS_CACHE_TTL: float = 300.0
+    CHAT_BROKER_URL: str | None = None
+    CHAT_SUBSCRIBER_QUEUE_SIZE: int = 256
+    CHAT_WRITE_BATCHING: bool = True
+    CHAT_WRITE_WINDOW_MS: float = 2.0
+    CHAT_WRITE_BATCH_SIZE: int = 500
+    CHAT_ARCHIVE_ENABLED: bool = True
+    CHAT_ARCHIVE_AFTER_DAYS: float = 90.0
+    CHAT_ARCHIVE_UNREAD_AFTER_DAYS: float = 365.0
+    CHAT_ARCHIVE_INTERVAL: float = 3600.0
+    CHAT_ARCHIVE_BATCH_SIZE: int = 5000
+    CHAT_ARCHIVE_SEGMENT_SIZE: int = 500
+    BULK_BATCH_SIZE: int = 1000
+    JOB_WORKERS: int = 4
+    JOB_QUEUE_SIZE: int = 10000
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BACKOFF: float = 1.0
+    JOB_MAX_BACKOFF: float = 300.0
+    JOB_DURABLE: bool = False
+    JOB_POLL_INTERVAL: float = 1.0
+    JOB_LEASE: float = 60.0
+    JOB_DRAIN_TIMEOUT: float = 10.0
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_URL: str | None = None
+    RATE_LIMIT_AUTH_ROUTE_RATE: float = 200.0
+    RATE_LIMIT_AUTH_ROUTE_BURST: int = 400
+    RATE_LIMIT_AUTH_USER_RATE: float = 1.0
+    RATE_LIMIT_AUTH_USER_BURST: int = 10
+    RATE_LIMIT_CATALOG_ROUTE_RATE: float = 2000.0
+    RATE_LIMIT_CATALOG_ROUTE_BURST: int = 4000
+    RATE_LIMIT_CATALOG_USER_RATE: float = 20.0
+    RATE_LIMIT_CATALOG_USER_BURST: int = 60
+    SHED_ENABLED: bool = True
+    SHED_MAX_QUEUE: int = 100
+    SHED_MAX_WAIT: float = 2.0
+    SERVER_HOST: str = '0.0.0.0'
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int = os.cpu_count() or 1
+    SERVER_BACKLOG: int = 2048
+    SERVER_KEEPALIVE: int = 5
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0
+    CATALOG_VERSION_CACHE_SIZE: int = 10000
+    CATALOG_VERSION_TTL: float = 5.0
+    CATALOG_RESPONSE_CACHE_SIZE: int = 1000
+    PRODUCT_SEARCH_BACKEND: str = 'auto'
+    METRICS_ENABLED: bool = True
+    SLOW_QUERY_MS: float | None = 200.0
+    PROFILE_SLOW_REQUEST_MS: float | None = None
+    PROFILE_INTERVAL_MS: float = 5.0
+    PROFILE_DIR: str = 'profiles'
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env")
     )
@@ -19,8 +88,146 @@ settings = Settings()
 
 
 def get_db_url():
+    if settings.DATABASE_URL:
+        return settings.DATABASE_URL
     return f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
 
 
+def get_replica_db_url():
+    return settings.DATABASE_REPLICA_URL
+
+
+def get_pool_config():
+    return {
+        "size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "timeout": settings.DB_POOL_TIMEOUT,
+        "pre_ping": settings.DB_POOL_PRE_PING,
+        "recycle": settings.DB_POOL_RECYCLE,
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "warmup": settings.DB_POOL_WARMUP,
+    }
+
+
+def get_server_config():
+    return {
+        "host": settings.SERVER_HOST,
+        "port": settings.SERVER_PORT,
+        "workers": settings.SERVER_WORKERS,
+        "backlog": settings.SERVER_BACKLOG,
+        "keepalive": settings.SERVER_KEEPALIVE,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT,
+    }
+
+
 def get_auth_data():
     return {"secret_key": settings.SECRET_KEY, "algorithm": settings.ALGORITHM}
+
+
+def get_token_config():
+    return {
+        "access_expire_minutes": settings.ACCESS_TOKEN_EXPIRE_MINUTES,
+        "refresh_expire_days": settings.REFRESH_TOKEN_EXPIRE_DAYS,
+        "claims": settings.TOKEN_CLAIMS,
+    }
+
+
+def get_hash_pool_config():
+    return {"executor": settings.HASH_EXECUTOR, "workers": settings.HASH_WORKERS, "queue_limit": settings.HASH_QUEUE_LIMIT}
+
+
+def get_cache_config():
+    return {"size": settings.ENTITY_CACHE_SIZE, "ttl": settings.ENTITY_CACHE_TTL, "url": settings.ENTITY_CACHE_URL}
+
+
+def get_link_access_config():
+    return {"size": settings.LINK_ACCESS_CACHE_SIZE, "ttl": settings.LINK_ACCESS_CACHE_TTL}
+
+
+def get_broker_config():
+    return {"url": settings.CHAT_BROKER_URL, "queue_size": settings.CHAT_SUBSCRIBER_QUEUE_SIZE}
+
+
+def get_catalog_cache_config():
+    return {
+        "version_size": settings.CATALOG_VERSION_CACHE_SIZE,
+        "version_ttl": settings.CATALOG_VERSION_TTL,
+        "response_size": settings.CATALOG_RESPONSE_CACHE_SIZE,
+    }
+
+
+def get_message_writer_config():
+    return {
+        "enabled": settings.CHAT_WRITE_BATCHING,
+        "window_ms": settings.CHAT_WRITE_WINDOW_MS,
+        "batch_size": settings.CHAT_WRITE_BATCH_SIZE,
+    }
+
+
+def get_job_queue_config():
+    return {
+        "workers": settings.JOB_WORKERS,
+        "queue_size": settings.JOB_QUEUE_SIZE,
+        "max_attempts": settings.JOB_MAX_ATTEMPTS,
+        "backoff": settings.JOB_RETRY_BACKOFF,
+        "max_backoff": settings.JOB_MAX_BACKOFF,
+        "durable": settings.JOB_DURABLE,
+        "poll_interval": settings.JOB_POLL_INTERVAL,
+        "lease": settings.JOB_LEASE,
+        "drain_timeout": settings.JOB_DRAIN_TIMEOUT,
+    }
+
+
+def get_rate_limit_config():
+    return {
+        "enabled": settings.RATE_LIMIT_ENABLED,
+        "url": settings.RATE_LIMIT_URL,
+        "limits": {
+            "auth": {
+                "route_rate": settings.RATE_LIMIT_AUTH_ROUTE_RATE,
+                "route_burst": settings.RATE_LIMIT_AUTH_ROUTE_BURST,
+                "user_rate": settings.RATE_LIMIT_AUTH_USER_RATE,
+                "user_burst": settings.RATE_LIMIT_AUTH_USER_BURST,
+            },
+            "catalog": {
+                "route_rate": settings.RATE_LIMIT_CATALOG_ROUTE_RATE,
+                "route_burst": settings.RATE_LIMIT_CATALOG_ROUTE_BURST,
+                "user_rate": settings.RATE_LIMIT_CATALOG_USER_RATE,
+                "user_burst": settings.RATE_LIMIT_CATALOG_USER_BURST,
+            },
+        },
+    }
+
+
+def get_load_shedding_config():
+    return {
+        "enabled": settings.SHED_ENABLED,
+        "capacity": settings.DB_POOL_SIZE + settings.DB_MAX_OVERFLOW,
+        "max_queue": settings.SHED_MAX_QUEUE,
+        "max_wait": settings.SHED_MAX_WAIT,
+    }
+
+
+def get_message_archive_config():
+    return {
+        "enabled": settings.CHAT_ARCHIVE_ENABLED,
+        "after_days": settings.CHAT_ARCHIVE_AFTER_DAYS,
+        "unread_after_days": settings.CHAT_ARCHIVE_UNREAD_AFTER_DAYS,
+        "interval": settings.CHAT_ARCHIVE_INTERVAL,
+        "batch_size": settings.CHAT_ARCHIVE_BATCH_SIZE,
+        "segment_size": settings.CHAT_ARCHIVE_SEGMENT_SIZE,
+    }
+
+
+def get_search_config():
+    return {"backend": settings.PRODUCT_SEARCH_BACKEND}
+
+
+def get_metrics_config():
+    return {
+        "enabled": settings.METRICS_ENABLED,
+        "slow_query_ms": settings.SLOW_QUERY_MS,
+        "profile_slow_request_ms": settings.PROFILE_SLOW_REQUEST_MS,
+        "profile_interval_ms": settings.PROFILE_INTERVAL_MS,
+        "profile_dir": settings.PROFILE_DIR,
+    }
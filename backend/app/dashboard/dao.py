@@ -0,0 +1,125 @@
+from sqlalchemy import event, func, select, union, update as sqlalchemy_update
+from sqlalchemy.orm import Session
+
+from app.base.dao import BaseDAO, REPLICA, dialect_insert
+from app.chat.models import Chat, Message, MessageSegment
+from app.dashboard.models import SupplierDashboard
+from app.database import RoutingSession, session_scope
+from app.links.models import Link
+from app.products.models import Product
+from app.users.models import User
+
+COUNTERS = ('product_count', 'approved_link_count', 'pending_link_count', 'chat_count', 'message_count')
+
+
+class SupplierDashboardDAO(BaseDAO):
+    model = SupplierDashboard
+
+    @classmethod
+    async def adjust(cls, session, deltas: dict[int, dict[str, int]]):
+        # deltas are summed per transaction and written by apply_pending just before commit,
+        # so the supplier's row is locked for the commit itself rather than the whole transaction
+        pending = session.info.setdefault('dashboard_deltas', {})
+        for supplier_id, counters in deltas.items():
+            totals = pending.setdefault(supplier_id, {})
+            for name, amount in counters.items():
+                totals[name] = totals.get(name, 0) + amount
+        cls._mark_write(session, {})
+
+    @classmethod
+    def apply_pending(cls, session: Session):
+        deltas = session.info.pop('dashboard_deltas', {})
+        rows = [
+            {'supplier_id': supplier_id, **{name: deltas[supplier_id].get(name, 0) for name in COUNTERS}}
+            for supplier_id in sorted(deltas) if any(deltas[supplier_id].values())
+        ]
+        if not rows:
+            return
+        query = dialect_insert(cls.model).values(rows)
+        query = query.on_conflict_do_update(
+            index_elements=[cls.model.supplier_id],
+            set_={**{name: getattr(cls.model, name) + query.excluded[name] for name in COUNTERS}, 'updated_at': func.now()},
+        )
+        session.execute(query)
+
+    @classmethod
+    def discard_pending(cls, session: Session):
+        session.info.pop('dashboard_deltas', None)
+
+    @classmethod
+    async def get_dashboard(cls, supplier_id: int, top_chats: int) -> dict:
+        summary = select(cls.model).filter_by(supplier_id=supplier_id)
+        chats = (
+            select(Chat.id, Chat.consumer_id, User.first_name, User.last_name, Chat.message_count, Chat.last_message_id)
+            .join(User, User.id == Chat.consumer_id)
+            .where(Chat.supplier_id == supplier_id)
+            .order_by(Chat.message_count.desc(), Chat.id.desc())
+            .limit(top_chats)
+        )
+        async with session_scope() as session:
+            row = (await session.execute(summary, bind_arguments=REPLICA)).scalar_one_or_none()
+            busiest = (await session.execute(chats, bind_arguments=REPLICA)).all() if top_chats else []
+        return {
+            'supplier_id': supplier_id,
+            **{name: getattr(row, name) if row is not None else 0 for name in COUNTERS},
+            'updated_at': row.updated_at if row is not None else None,
+            'busiest_chats': [
+                {
+                    'id': chat.id,
+                    'consumer_id': chat.consumer_id,
+                    'consumer_name': ' '.join(filter(None, [chat.first_name, chat.last_name])),
+                    'message_count': chat.message_count,
+                    'last_message_id': chat.last_message_id,
+                }
+                for chat in busiest
+            ],
+        }
+
+    @classmethod
+    async def get_supplier_ids(cls) -> list[int]:
+        query = union(
+            select(cls.model.supplier_id),
+            select(User.id).where(User.is_supplier_owner.is_(True)),
+            select(Product.supplier_id).distinct(),
+            select(Link.supplier_id).distinct(),
+            select(Chat.supplier_id).where(Chat.supplier_id.isnot(None)).distinct(),
+        )
+        async with session_scope() as session:
+            return sorted((await session.execute(query)).scalars().all())
+
+    @classmethod
+    async def rebuild(cls, supplier_ids: list[int]) -> int:
+        if not supplier_ids:
+            return 0
+        supplier_ids = sorted(set(supplier_ids))
+        async with session_scope() as session:
+            chats = select(Chat.id).where(Chat.supplier_id.in_(supplier_ids)).order_by(Chat.id).with_for_update()
+            await session.execute(chats)
+            suppliers = select(User.id).where(User.id.in_(supplier_ids))
+            await session.execute(dialect_insert(cls.model).from_select(['supplier_id'], suppliers).on_conflict_do_nothing())
+            locked = select(cls.model.supplier_id).where(cls.model.supplier_id.in_(supplier_ids)).order_by(cls.model.supplier_id).with_for_update()
+            await session.execute(locked)
+
+            hot = select(func.count()).where(Message.chat_id == Chat.id).correlate(Chat).scalar_subquery()
+            cold = select(func.coalesce(func.sum(MessageSegment.count), 0)).where(MessageSegment.chat_id == Chat.id).correlate(Chat).scalar_subquery()
+            query = sqlalchemy_update(Chat).where(Chat.supplier_id.in_(supplier_ids)).values(message_count=hot + cold)
+            await session.execute(query.execution_options(synchronize_session=False))
+
+            supplier_id = cls.model.supplier_id
+            counts = {
+                'product_count': select(func.count()).where(Product.supplier_id == supplier_id),
+                'approved_link_count': select(func.count()).where(Link.supplier_id == supplier_id, Link.is_approved.is_(True)),
+                'pending_link_count': select(func.count()).where(Link.supplier_id == supplier_id, Link.is_approved.isnot(True)),
+                'chat_count': select(func.count()).where(Chat.supplier_id == supplier_id),
+                'message_count': select(func.coalesce(func.sum(Chat.message_count), 0)).where(Chat.supplier_id == supplier_id),
+            }
+            query = sqlalchemy_update(cls.model).where(supplier_id.in_(supplier_ids)).values(
+                **{name: count.scalar_subquery() for name, count in counts.items()}, updated_at=func.now()
+            )
+            result = await session.execute(query.execution_options(synchronize_session=False))
+            cls._mark_write(session, {})
+        return result.rowcount
+
+
+event.listen(RoutingSession, 'before_commit', SupplierDashboardDAO.apply_pending)
+event.listen(RoutingSession, 'after_rollback', SupplierDashboardDAO.discard_pending)
@@ -0,0 +1,12 @@
+from sqlalchemy import ForeignKey, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+
+class SupplierDashboard(Base):
+    supplier_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    product_count: Mapped[int] = mapped_column(nullable=False, default=0, server_default=text('0'))
+    approved_link_count: Mapped[int] = mapped_column(nullable=False, default=0, server_default=text('0'))
+    pending_link_count: Mapped[int] = mapped_column(nullable=False, default=0, server_default=text('0'))
+    chat_count: Mapped[int] = mapped_column(nullable=False, default=0, server_default=text('0'))
+    message_count: Mapped[int] = mapped_column(nullable=False, default=0, server_default=text('0'))
@@ -0,0 +1,22 @@
+import argparse
+import asyncio
+
+from app.dashboard.dao import SupplierDashboardDAO
+from app.database import dispose_engines
+from app.products.models import Product  # noqa: F401 -- registers the mapper User.products needs when run as a script
+
+
+async def main(args):
+    supplier_ids = args.supplier_id or await SupplierDashboardDAO.get_supplier_ids()
+    total = 0
+    for start in range(0, len(supplier_ids), args.batch_size):
+        total += await SupplierDashboardDAO.rebuild(supplier_ids[start:start + args.batch_size])
+    print(f'rebuilt dashboards of {total} suppliers')
+    await dispose_engines()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Recompute supplier dashboard counters from products, links and chats')
+    parser.add_argument('--supplier-id', type=int, action='append', help='rebuild only this supplier, may be repeated')
+    parser.add_argument('--batch-size', type=int, default=100, help='suppliers recomputed per transaction')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends, Query
+
+from app.dashboard.dao import SupplierDashboardDAO
+from app.dashboard.schemas import SDashboard
+from app.users.dependecies import get_current_principal
+from app.users.schemas import SUserClaims
+
+router = APIRouter(prefix='/dashboard', tags=['Dashboard endpoints'])
+
+@router.get('/', summary="Get supplier dashboard counters")
+async def get_dashboard(top_chats: int = Query(5, ge=0, le=50), current_user: SUserClaims = Depends(get_current_principal)) -> SDashboard | dict:
+    if current_user.is_consumer:
+        return {'message': 'This endpoint only for suppliers'}
+    supplier_id = current_user.supplier_owner_id or current_user.id
+    return await SupplierDashboardDAO.get_dashboard(supplier_id, top_chats)
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from pydantic import BaseModel
+
+
+class SDashboardChat(BaseModel):
+    id: int
+    consumer_id: int
+    consumer_name: str
+    message_count: int
+    last_message_id: int
+
+
+class SDashboard(BaseModel):
+    supplier_id: int
+    product_count: int = 0
+    approved_link_count: int = 0
+    pending_link_count: int = 0
+    chat_count: int = 0
+    message_count: int = 0
+    updated_at: datetime | None = None
+    busiest_chats: list[SDashboardChat] = []
@@ -1,16 +1,68 @@
+import inspect
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from contextvars import ContextVar
 from datetime import datetime
 from typing import Annotated
 
-from sqlalchemy import func
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs
-from sqlalchemy.orm import DeclarativeBase, declared_attr, Mapped, mapped_column
+from sqlalchemy import func, make_url
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs, AsyncSession
+from sqlalchemy.orm import DeclarativeBase, Session, declared_attr, Mapped, mapped_column
+from sqlalchemy.sql.dml import UpdateBase
 
-from app.config import get_db_url
+from app.config import get_db_url, get_pool_config, get_replica_db_url
+
+logger = logging.getLogger(__name__)
 
 DATABASE_URL = get_db_url()
+REPLICA_DATABASE_URL = get_replica_db_url()
+
+
+def engine_options(url: str) -> dict:
+    pool_config = get_pool_config()
+    options = {'pool_pre_ping': pool_config['pre_ping'], 'pool_recycle': pool_config['recycle']}
+    url = make_url(url)
+    if url.get_backend_name() == 'postgresql':
+        options.update(pool_size=pool_config['size'], max_overflow=pool_config['max_overflow'], pool_timeout=pool_config['timeout'])
+    if url.get_driver_name() == 'asyncpg':
+        options['connect_args'] = {'prepared_statement_cache_size': pool_config['statement_cache_size']}
+    return options
+
+
+def make_engine(url: str):
+    return create_async_engine(url, **engine_options(url))
+
+
+engine = make_engine(DATABASE_URL)
+replica_engine = make_engine(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else engine
+engines = [engine] if replica_engine is engine else [engine, replica_engine]
+
+
+read_primary: ContextVar[bool] = ContextVar('read_primary', default=False)
+
+
+@contextmanager
+def primary_reads():
+    token = read_primary.set(True)
+    try:
+        yield
+    finally:
+        read_primary.reset(token)
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, *, clause=None, replica: bool = False, **kw):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info['has_writes'] = True
+        elif replica and not self.info.get('has_writes') and not read_primary.get():
+            return replica_engine.sync_engine
+        return super().get_bind(mapper, clause=clause, **kw)
+
+
+async_session_maker = async_sessionmaker(engine, expire_on_commit=False, sync_session_class=RoutingSession)
 
-engine = create_async_engine(DATABASE_URL)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+current_session: ContextVar[AsyncSession | None] = ContextVar('current_session', default=None)
 
 int_pk = Annotated[int, mapped_column(primary_key=True)]
 created_at = Annotated[datetime, mapped_column(server_default=func.now())]
@@ -30,6 +82,70 @@ class Base(AsyncAttrs, DeclarativeBase):
     updated_at: Mapped[updated_at]
 
 
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+async def warm_up_pool():
+    for pool_engine in engines:
+        size = getattr(pool_engine.sync_engine.pool, 'size', lambda: 0)()
+        try:
+            async with AsyncExitStack() as stack:
+                for _ in range(size):
+                    await stack.enter_async_context(pool_engine.connect())
+        except (OSError, SQLAlchemyError) as e:
+            logger.warning('connection pool warm-up failed for %s: %s', pool_engine.url.render_as_string(hide_password=True), e)
+
+
+async def dispose_engines():
+    for pool_engine in engines:
+        await pool_engine.dispose()
+
+
+def on_commit(session: AsyncSession, callback):
+    session.info.setdefault('on_commit', []).append(callback)
+
+
+async def _call_hook(callback):
+    result = callback()
+    if inspect.isawaitable(result):
+        await result
+
+
+async def run_commit_hooks(session: AsyncSession):
+    for callback in session.info.pop('on_commit', []):
+        try:
+            await _call_hook(callback)
+        except Exception:
+            logger.exception('commit hook %r failed', callback)
+
+
+async def after_commit(callback):
+    session = current_session.get()
+    if session is not None:
+        on_commit(session, callback)
+    else:
+        await _call_hook(callback)
+
+
+async def get_session():
+    async with async_session_maker() as session:
+        token = current_session.set(session)
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            session.info.pop('on_commit', None)
+            await session.rollback()
+            raise
+        finally:
+            current_session.reset(token)
+        await run_commit_hooks(session)
+
+
+@asynccontextmanager
+async def session_scope():
+    session = current_session.get()
+    if session is not None:
+        yield session
+        return
+    async with async_session_maker() as session:
+        async with session.begin():
+            yield session
+        await run_commit_hooks(session)
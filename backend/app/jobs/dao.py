@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from sqlalchemy import func, select, update as sqlalchemy_update
+
+from app.base.dao import BaseDAO
+from app.database import session_scope
+from app.jobs.models import Job
+
+
+class JobDAO(BaseDAO):
+    model = Job
+
+    @classmethod
+    async def claim(cls, lease: float, limit: int = 1):
+        now = func.localtimestamp()
+        ready = select(cls.model.id).where(
+            cls.model.status == 'pending',
+            cls.model.run_at <= now,
+            (cls.model.locked_until.is_(None)) | (cls.model.locked_until < now),
+        ).order_by(cls.model.run_at).limit(limit).with_for_update(skip_locked=True)
+        query = sqlalchemy_update(cls.model).where(cls.model.id.in_(ready.scalar_subquery())).values(
+            locked_until=now + timedelta(seconds=lease), attempts=cls.model.attempts + 1,
+        ).returning(cls.model, now.label('claimed_at'))
+        async with session_scope() as session:
+            result = await session.execute(query)
+            cls._mark_write(session, {})
+            return result.all()
+
+    @classmethod
+    async def retry(cls, job_id: int, delay: float, error: str):
+        await cls.update(
+            {'id': job_id}, run_at=func.localtimestamp() + timedelta(seconds=delay), locked_until=None, last_error=error,
+        )
+
+    @classmethod
+    async def fail(cls, job_id: int, error: str):
+        await cls.update({'id': job_id}, status='failed', locked_until=None, last_error=error)
+
+    @classmethod
+    async def depth(cls) -> int:
+        async with session_scope() as session:
+            query = select(func.count()).select_from(cls.model).where(cls.model.status == 'pending')
+            return (await session.execute(query)).scalar_one()
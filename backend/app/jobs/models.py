@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Index, func, text
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base, int_pk, str_null_true
+
+
+class Job(Base):
+    __table_args__ = (
+        Index('ix_jobs_status_run_at', 'status', 'run_at'),
+    )
+
+    id: Mapped[int_pk]
+    name: Mapped[str]
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(nullable=False, default='pending', server_default=text("'pending'"))
+    attempts: Mapped[int] = mapped_column(nullable=False, default=0, server_default=text('0'))
+    run_at: Mapped[datetime] = mapped_column(nullable=False, server_default=func.now())
+    locked_until: Mapped[datetime | None]
+    last_error: Mapped[str_null_true]
@@ -0,0 +1,213 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import partial
+
+from app.base.metrics import registry
+from app.config import get_job_queue_config
+from app.database import after_commit, async_session_maker, current_session, run_commit_hooks
+from app.jobs.dao import JobDAO
+
+logger = logging.getLogger(__name__)
+
+job_wait = registry.histogram('job_wait_seconds', 'Time from a job becoming ready to its start', ('job',))
+job_duration = registry.histogram('job_duration_seconds', 'Job handler run time', ('job',))
+job_results = registry.counter('jobs_total', 'Job attempts by outcome', ('job', 'outcome'))
+
+
+@dataclass
+class QueuedJob:
+    name: str
+    payload: dict
+    attempts: int = 0
+    id: int | None = None
+    ready_at: float = field(default_factory=time.monotonic)
+
+
+class JobQueue:
+    def __init__(self, workers: int, queue_size: int, max_attempts: int, backoff: float, max_backoff: float,
+                 durable: bool = False, poll_interval: float = 1.0, lease: float = 60.0, drain_timeout: float = 10.0):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.durable = durable
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.drain_timeout = drain_timeout
+        self.running = False
+        self._handlers = {}
+        self._queue: asyncio.Queue | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._delayed: set[asyncio.Task] = set()
+        self._stored_depth = 0
+
+    def handler(self, name: str):
+        def register(func):
+            self._handlers[name] = func
+            return func
+        return register
+
+    async def enqueue(self, name: str, **payload):
+        if name not in self._handlers:
+            raise ValueError(f'Unknown job {name!r}')
+        if self.durable:
+            await JobDAO.add(name=name, payload=payload)
+            await after_commit(self._notify)
+        else:
+            await after_commit(partial(self._put, QueuedJob(name, payload)))
+
+    def _notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _put(self, job: QueuedJob):
+        if not self.running:
+            await self._run(job)
+            return
+        job.ready_at = time.monotonic()
+        await self._queue.put(job)
+
+    def depth(self) -> int:
+        if self.durable:
+            return self._stored_depth
+        return (self._queue.qsize() if self._queue is not None else 0) + len(self._delayed)
+
+    async def _execute(self, job: QueuedJob):
+        async with async_session_maker() as session:
+            token = current_session.set(session)
+            try:
+                await self._handlers[job.name](**job.payload)
+                if job.id is not None:
+                    await JobDAO.delete(id=job.id)
+                await session.commit()
+            except Exception:
+                session.info.pop('on_commit', None)
+                await session.rollback()
+                raise
+            finally:
+                current_session.reset(token)
+        await run_commit_hooks(session)
+
+    async def _run(self, job: QueuedJob, waited: float | None = None):
+        job_wait.observe(time.monotonic() - job.ready_at if waited is None else waited, job.name)
+        start = time.perf_counter()
+        try:
+            await self._execute(job)
+        except Exception as e:
+            job_duration.observe(time.perf_counter() - start, job.name)
+            await self._failed(job, e)
+            return
+        job_duration.observe(time.perf_counter() - start, job.name)
+        job_results.inc(job.name, 'ok')
+
+    async def _failed(self, job: QueuedJob, error: Exception):
+        if job.id is None:
+            job.attempts += 1
+        message = f'{type(error).__name__}: {error}'
+        if job.attempts >= self.max_attempts or (job.id is None and not self.running):
+            job_results.inc(job.name, 'failed')
+            logger.error('job %s failed after %s attempts: %s', job.name, job.attempts, message)
+            if job.id is not None:
+                await JobDAO.fail(job.id, message)
+            return
+        delay = min(self.max_backoff, self.backoff * 2 ** (job.attempts - 1))
+        job_results.inc(job.name, 'retry')
+        logger.warning('job %s attempt %s failed, retrying in %.1fs: %s', job.name, job.attempts, delay, message)
+        if job.id is not None:
+            await JobDAO.retry(job.id, delay, message)
+        else:
+            task = asyncio.create_task(self._put_later(job, delay))
+            self._delayed.add(task)
+            task.add_done_callback(self._delayed.discard)
+
+    async def _put_later(self, job: QueuedJob, delay: float):
+        await asyncio.sleep(delay)
+        await self._put(job)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _stored_worker(self):
+        while self.running:
+            try:
+                claimed = await JobDAO.claim(self.lease)
+            except Exception as e:
+                logger.warning('claiming jobs failed: %s', e)
+                claimed = []
+            if not claimed:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            row, claimed_at = claimed[0]
+            job = QueuedJob(row.name, row.payload, row.attempts, row.id)
+            try:
+                await self._run(job, (claimed_at - row.run_at).total_seconds())
+            except Exception as e:
+                logger.warning('recording the result of job %s failed, it will be retried after its lease: %s', row.id, e)
+
+    async def _track_depth(self):
+        while True:
+            try:
+                self._stored_depth = await JobDAO.depth()
+            except Exception as e:
+                logger.warning('counting jobs failed: %s', e)
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self):
+        self._queue = asyncio.Queue(self.queue_size)
+        self._wakeup = asyncio.Event()
+        self.running = True
+        worker = self._stored_worker if self.durable else self._worker
+        self._tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+        if self.durable:
+            self._tasks.append(asyncio.create_task(self._track_depth()))
+
+    async def stop(self):
+        if not self.running:
+            return
+        self.running = False
+        self._wakeup.set()
+        if self.durable:
+            workers = self._tasks[:self.workers]
+            _, pending = await asyncio.wait(workers, timeout=self.drain_timeout)
+            if pending:
+                logger.warning('%s jobs still running at shutdown, they will be retried after their lease', len(pending))
+        else:
+            if self._delayed:
+                logger.warning('dropping %s jobs waiting for a retry', len(self._delayed))
+            for task in self._delayed:
+                task.cancel()
+            try:
+                await asyncio.wait_for(self._queue.join(), self.drain_timeout)
+            except asyncio.TimeoutError:
+                logger.warning('job queue drain timed out with %s jobs left', self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._delayed, return_exceptions=True)
+        self._tasks = []
+
+
+def create_job_queue() -> JobQueue:
+    queue_config = get_job_queue_config()
+    return JobQueue(
+        queue_config['workers'], queue_config['queue_size'], queue_config['max_attempts'], queue_config['backoff'],
+        queue_config['max_backoff'], queue_config['durable'], queue_config['poll_interval'], queue_config['lease'],
+        queue_config['drain_timeout'],
+    )
+
+
+job_queue = create_job_queue()
+
+registry.gauge('job_queue_depth', 'Jobs waiting to run', job_queue.depth)
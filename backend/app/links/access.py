@@ -0,0 +1,76 @@
+import asyncio
+
+from app.base.cache import LRUCache
+from app.chat.broker import broker
+from app.config import get_link_access_config
+from app.links.dao import LinkDAO
+
+LINK_ACCESS_CHANNEL = 'links:access'
+
+
+class LinkAccessIndex:
+    def __init__(self, maxsize: int, ttl: float):
+        self._suppliers = LRUCache(maxsize, ttl)
+        self._generation = 0
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    async def has_access(self, supplier_id: int, consumer_id: int) -> bool:
+        consumers = self._suppliers.get(supplier_id)
+        if consumers is None:
+            generation = self._generation
+            consumers = await LinkDAO.get_approved_consumer_ids(supplier_id)
+            # a grant or revoke that landed while loading may be missing from this result
+            if generation == self._generation:
+                self._suppliers.set(supplier_id, consumers)
+        return consumer_id in consumers
+
+    def _apply(self, supplier_id: int, consumer_id: int, approved: bool):
+        self._generation += 1
+        consumers = self._suppliers.get(supplier_id)
+        if consumers is None:
+            return
+        if approved:
+            consumers.add(consumer_id)
+        else:
+            consumers.discard(consumer_id)
+
+    async def _publish(self, supplier_id: int, consumer_id: int, approved: bool):
+        self._apply(supplier_id, consumer_id, approved)
+        event = {'supplier_id': supplier_id, 'consumer_id': consumer_id, 'approved': approved}
+        await broker.publish([LINK_ACCESS_CHANNEL], event)
+
+    async def grant(self, supplier_id: int, consumer_id: int):
+        await self._publish(supplier_id, consumer_id, True)
+
+    async def revoke(self, supplier_id: int, consumer_id: int):
+        await self._publish(supplier_id, consumer_id, False)
+
+    def invalidate(self, supplier_id: int):
+        self._generation += 1
+        self._suppliers.delete(supplier_id)
+
+    async def _listen(self):
+        while True:
+            event = await self._queue.get()
+            self._apply(event['supplier_id'], event['consumer_id'], event['approved'])
+
+    async def start(self):
+        self._queue = broker.subscribe(LINK_ACCESS_CHANNEL)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        broker.unsubscribe(self._queue, LINK_ACCESS_CHANNEL)
+
+
+def create_link_access() -> LinkAccessIndex:
+    access_config = get_link_access_config()
+    return LinkAccessIndex(access_config['size'], access_config['ttl'])
+
+
+link_access = create_link_access()
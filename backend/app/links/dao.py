@@ -1,6 +1,84 @@
+from sqlalchemy import delete as sqlalchemy_delete, exists, insert as sqlalchemy_insert, select, update as sqlalchemy_update
+
 from app.base.dao import BaseDAO
+from app.chat.models import Chat, Message, MessageSegment
+from app.dashboard.dao import SupplierDashboardDAO
+from app.database import session_scope
 from app.links.models import Link
 
 
 class LinkDAO(BaseDAO):
     model = Link
+
+    @classmethod
+    async def get_approved_consumer_ids(cls, supplier_id: int) -> set[int]:
+        async with session_scope() as session:
+            query = select(cls.model.consumer_id).filter_by(supplier_id=supplier_id, is_approved=True)
+            result = await session.execute(query)
+            return set(result.scalars().all())
+
+    @classmethod
+    async def get_approved_supplier_ids(cls, consumer_id: int) -> set[int]:
+        async with session_scope() as session:
+            query = select(cls.model.supplier_id).filter_by(consumer_id=consumer_id, is_approved=True)
+            result = await session.execute(query)
+            return set(result.scalars().all())
+
+    @classmethod
+    async def add(cls, **values):
+        async with session_scope() as session:
+            new_instance = cls.model(**values)
+            session.add(new_instance)
+            await session.flush()
+            counter = 'approved_link_count' if new_instance.is_approved else 'pending_link_count'
+            await SupplierDashboardDAO.adjust(session, {new_instance.supplier_id: {counter: 1}})
+            cls._mark_write(session, {})
+            return new_instance
+
+    @classmethod
+    async def approve_many(cls, supplier_id: int, consumer_ids: list[int]) -> set[int]:
+        if not consumer_ids:
+            return set()
+        async with session_scope() as session:
+            query = sqlalchemy_update(cls.model).where(
+                cls.model.supplier_id == supplier_id,
+                cls.model.consumer_id.in_(consumer_ids),
+                cls.model.is_approved.isnot(True),
+            ).values(is_approved=True).returning(cls.model.consumer_id)
+            approved = set((await session.execute(query)).scalars().all())
+            if approved:
+                has_chat = exists().where(Chat.supplier_id == cls.model.supplier_id, Chat.consumer_id == cls.model.consumer_id)
+                pairs = select(cls.model.supplier_id, cls.model.consumer_id).where(
+                    cls.model.supplier_id == supplier_id, cls.model.consumer_id.in_(approved), ~has_chat
+                )
+                query = sqlalchemy_insert(Chat).from_select(['supplier_id', 'consumer_id'], pairs).returning(Chat.id)
+                chats = (await session.execute(query)).scalars().all()
+                await SupplierDashboardDAO.adjust(session, {supplier_id: {
+                    'approved_link_count': len(approved), 'pending_link_count': -len(approved), 'chat_count': len(chats),
+                }})
+            cls._mark_write(session, {})
+            return approved
+
+    @classmethod
+    async def reject_many(cls, supplier_id: int, consumer_ids: list[int]) -> set[int]:
+        if not consumer_ids:
+            return set()
+        async with session_scope() as session:
+            query = sqlalchemy_delete(cls.model).where(
+                cls.model.supplier_id == supplier_id, cls.model.consumer_id.in_(consumer_ids)
+            ).returning(cls.model.consumer_id, cls.model.is_approved)
+            links = (await session.execute(query)).all()
+            rejected = {link.consumer_id for link in links}
+            if rejected:
+                chats = select(Chat.id).where(Chat.supplier_id == supplier_id, Chat.consumer_id.in_(rejected))
+                await session.execute(sqlalchemy_delete(Message).where(Message.chat_id.in_(chats)))
+                await session.execute(sqlalchemy_delete(MessageSegment).where(MessageSegment.chat_id.in_(chats)))
+                query = sqlalchemy_delete(Chat).where(Chat.supplier_id == supplier_id, Chat.consumer_id.in_(rejected))
+                message_counts = (await session.execute(query.returning(Chat.message_count))).scalars().all()
+                approved = sum(1 for link in links if link.is_approved)
+                await SupplierDashboardDAO.adjust(session, {supplier_id: {
+                    'approved_link_count': -approved, 'pending_link_count': approved - len(links),
+                    'chat_count': -len(message_counts), 'message_count': -sum(message_counts),
+                }})
+            cls._mark_write(session, {})
+            return rejected
@@ -0,0 +1,8 @@
+from app.chat.broker import broker, consumer_channel
+from app.jobs.queue import job_queue
+
+
+@job_queue.handler('links.notify')
+async def notify_link_decisions(supplier_id: int, consumer_ids: list[int], status: str):
+    event = {'type': 'link', 'supplier_id': supplier_id, 'status': status}
+    await broker.publish([consumer_channel(consumer_id) for consumer_id in consumer_ids], event)
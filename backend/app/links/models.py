@@ -1,8 +1,13 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Link(Base):
+    __table_args__ = (
+        Index('ix_links_consumer_id_is_approved', 'consumer_id', 'is_approved'),
+        Index('ix_links_supplier_id_is_approved', 'supplier_id', 'is_approved'),
+    )
+
     supplier_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
     consumer_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
     is_approved = Column(Boolean, default=False)
@@ -1,19 +1,25 @@
+from functools import partial
+
 from fastapi import APIRouter, Depends
+from app.database import after_commit
+from app.jobs.queue import job_queue
+from app.links import jobs
+from app.links.access import link_access
 from app.links.dao import LinkDAO
-from app.users.dependecies import get_current_user
-from app.users.models import User
-from app.chat.dao import ChatDAO
+from app.links.schemas import SLink, SLinkBulk, SLinkBulkResult, SLinkDecision
+from app.users.dependecies import get_current_principal
+from app.users.schemas import SUserClaims
 
 router = APIRouter(prefix='/links', tags=['Link endpoints'])
 
 @router.get('/suppliers/')
-async def get_linked_suppliers(current_user: User = Depends(get_current_user)):
+async def get_linked_suppliers(current_user: SUserClaims = Depends(get_current_principal)) -> list[SLink] | dict:
     if not current_user.is_consumer:
         return {'message': 'This endpoint only for consumers'}
     return await LinkDAO.get_all(consumer_id=current_user.id, is_approved=True)
 
 @router.get('/consumers/')
-async def get_linked_consumers(current_user: User = Depends(get_current_user)):
+async def get_linked_consumers(current_user: SUserClaims = Depends(get_current_principal)) -> list[SLink] | dict:
     if current_user.is_consumer:
         return {'message': 'This endpoint only for suppliers'}
     supplier_id = current_user.id
@@ -22,13 +28,13 @@ async def get_linked_consumers(current_user: User = Depends(get_current_user)):
     return await LinkDAO.get_all(supplier_id=supplier_id, is_approved=True)
 
 @router.get('/sent/')
-async def get_sent_links(current_user: User = Depends(get_current_user)):
+async def get_sent_links(current_user: SUserClaims = Depends(get_current_principal)) -> list[SLink] | dict:
     if not current_user.is_consumer:
         return {'message': 'This endpoint only for consumers'}
     return await LinkDAO.get_all(consumer_id=current_user.id, is_approved=False)
 
 @router.get('/received/')
-async def get_received_linkks(current_user: User = Depends(get_current_user)):
+async def get_received_linkks(current_user: SUserClaims = Depends(get_current_principal)) -> list[SLink] | dict:
     if current_user.is_consumer:
         return {'message': 'This endpoint only for suppliers'}
     supplier_id = current_user.id
@@ -37,36 +43,76 @@ async def get_received_linkks(current_user: User = Depends(get_current_user)):
     return await LinkDAO.get_all(supplier_id=supplier_id, is_approved=False)
 
 @router.post('/send-request/')
-async def send_request(supplier_id: int, current_user: User = Depends(get_current_user)):
+async def send_request(supplier_id: int, current_user: SUserClaims = Depends(get_current_principal)) -> dict:
     if not current_user.is_consumer:
         return {'message': 'Only consumers can send request!'}
     result = await LinkDAO.add(supplier_id=supplier_id, consumer_id=current_user.id)
     if result:
+        await after_commit(partial(link_access.revoke, supplier_id, current_user.id))
         return {'message': 'Request sent succesffully!'}
     return {'message': 'Request failed to send!'}
 
+def decide_many(consumer_ids: list[int], changed: set[int], action: str) -> SLinkBulkResult:
+    results = [
+        SLinkDecision(consumer_id=consumer_id, status=action if consumer_id in changed else 'not_found')
+        for consumer_id in dict.fromkeys(consumer_ids)
+    ]
+    return SLinkBulkResult(**{action: len(changed)}, results=results)
+
+async def approve_many(supplier_id: int, consumer_ids: list[int]) -> set[int]:
+    approved = await LinkDAO.approve_many(supplier_id, consumer_ids)
+    for consumer_id in approved:
+        await after_commit(partial(link_access.grant, supplier_id, consumer_id))
+    if approved:
+        await job_queue.enqueue('links.notify', supplier_id=supplier_id, consumer_ids=sorted(approved), status='approved')
+    return approved
+
+async def reject_many(supplier_id: int, consumer_ids: list[int]) -> set[int]:
+    rejected = await LinkDAO.reject_many(supplier_id, consumer_ids)
+    for consumer_id in rejected:
+        await after_commit(partial(link_access.revoke, supplier_id, consumer_id))
+    if rejected:
+        await job_queue.enqueue('links.notify', supplier_id=supplier_id, consumer_ids=sorted(rejected), status='rejected')
+    return rejected
+
 @router.put('/approve-request/')
-async def approve_request(consumer_id: int, current_user: User = Depends(get_current_user)):
+async def approve_request(consumer_id: int, current_user: SUserClaims = Depends(get_current_principal)) -> dict:
     if current_user.is_consumer or current_user.is_supplier_repr:
         return {'message': 'Only supplier owners or managers can approve requests!'}
     supplier_id = current_user.id
     if current_user.is_supplier_manager:
         supplier_id = current_user.supplier_owner_id
-    result = await LinkDAO.update(filter_by={'supplier_id': supplier_id, 'consumer_id': consumer_id}, is_approved=True)
-    if result:
-        await ChatDAO.add(supplier_id=supplier_id, consumer_id=consumer_id)
+    if await approve_many(supplier_id, [consumer_id]):
         return {'message': 'Request approved succesfully!'}
     return {'message': 'Request failed to approve!'}
 
 @router.delete("/reject-request/")
-async def reject_request(consumer_id: int, current_user: User = Depends(get_current_user)):
+async def reject_request(consumer_id: int, current_user: SUserClaims = Depends(get_current_principal)) -> dict:
     if current_user.is_consumer or current_user.is_supplier_repr:
         return {'message': 'Only supplier owners or managers can reject request!'}
     supplier_id = current_user.id
     if current_user.is_supplier_manager:
         supplier_id = current_user.supplier_owner_id
-    result = await LinkDAO.delete(supplier_id=supplier_id, consumer_id=consumer_id)
-    if result:
-        await ChatDAO.delete(supplier_id=supplier_id, consumer_id=consumer_id)
+    if await reject_many(supplier_id, [consumer_id]):
         return {'message': 'Request rejected succesfully!'}
     return {'message': 'Request failed to reject!'}
+
+@router.put('/bulk/approve/', summary="Approve many link requests")
+async def bulk_approve(body: SLinkBulk, current_user: SUserClaims = Depends(get_current_principal)) -> SLinkBulkResult | dict:
+    if current_user.is_consumer or current_user.is_supplier_repr:
+        return {'message': 'Only supplier owners or managers can approve requests!'}
+    supplier_id = current_user.id
+    if current_user.is_supplier_manager:
+        supplier_id = current_user.supplier_owner_id
+    approved = await approve_many(supplier_id, body.consumer_ids)
+    return decide_many(body.consumer_ids, approved, 'approved')
+
+@router.delete('/bulk/reject/', summary="Reject many link requests")
+async def bulk_reject(body: SLinkBulk, current_user: SUserClaims = Depends(get_current_principal)) -> SLinkBulkResult | dict:
+    if current_user.is_consumer or current_user.is_supplier_repr:
+        return {'message': 'Only supplier owners or managers can reject request!'}
+    supplier_id = current_user.id
+    if current_user.is_supplier_manager:
+        supplier_id = current_user.supplier_owner_id
+    rejected = await reject_many(supplier_id, body.consumer_ids)
+    return decide_many(body.consumer_ids, rejected, 'rejected')
@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class SLink(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    supplier_id: int
+    consumer_id: int
+    is_approved: bool | None = None
+    created_at: datetime | None = None
+
+
+class SLinkBulk(BaseModel):
+    consumer_ids: list[int] = Field(..., min_length=1, max_length=100)
+
+
+class SLinkDecision(BaseModel):
+    consumer_id: int
+    status: Literal['approved', 'rejected', 'not_found']
+
+
+class SLinkBulkResult(BaseModel):
+    approved: int = 0
+    rejected: int = 0
+    results: list[SLinkDecision]
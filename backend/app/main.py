@@ -1,25 +1,59 @@
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
-from app.database import init_db
+from app.config import get_metrics_config, get_pool_config
+from app.database import dispose_engines, engine, get_session, replica_engine, warm_up_pool
+from app.base.metrics import MetricsMiddleware, instrument_engine, registry
+from app.base.profiler import create_profiler
+from app.users.auth import shutdown_hash_executor
+from app.users.revocations import token_revocations
+from app.links.access import link_access
+from app.chat.broker import broker
+from app.chat.archive import message_archiver
+from app.chat.writer import message_writer
+from app.jobs.queue import job_queue
 from app.products.models import Product
 from app.users.models import User
 from app.links.models import Link
-from app.chat.models import Chat, Message
+from app.chat.models import Chat, Message, MessageSegment
+from app.jobs.models import Job
+from app.dashboard.models import SupplierDashboard
 from app.products.router import router as products_router
 from app.users.router import router as users_router
 from app.links.router import router as links_router
 from app.chat.router import router as chat_router
+from app.dashboard.router import router as dashboard_router
+
+profiler = create_profiler()
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    print("Initializing database...")
-    await init_db()
+    if get_pool_config()['warmup']:
+        await warm_up_pool()
+    await broker.start()
+    await token_revocations.start()
+    await link_access.start()
+    await message_writer.start()
+    await job_queue.start()
+    await message_archiver.start()
+    if profiler:
+        profiler.start()
     yield
+    if profiler:
+        profiler.stop()
+    await message_archiver.stop()
+    await job_queue.stop()
+    await message_writer.stop()
+    await link_access.stop()
+    await token_revocations.stop()
+    await broker.stop()
+    shutdown_hash_executor()
+    await dispose_engines()
 
-app = FastAPI(root_path="/api", lifespan=lifespan)
+app = FastAPI(root_path="/api", lifespan=lifespan, dependencies=[Depends(get_session, scope="function")])
 
 app.add_middleware(
 	CORSMiddleware,
@@ -29,6 +63,16 @@ app.add_middleware(
 	allow_headers=["*"],
 )
 
+if get_metrics_config()['enabled']:
+    instrument_engine(engine)
+    if replica_engine is not engine:
+        instrument_engine(replica_engine, 'db_replica')
+    app.add_middleware(MetricsMiddleware, profiler=profiler)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 def hello_world():
     return {"message": "Hello World!"}
@@ -38,3 +82,4 @@ app.include_router(products_router)
 app.include_router(users_router)
 app.include_router(links_router)
 app.include_router(chat_router)
+app.include_router(dashboard_router)
@@ -0,0 +1,193 @@
+import csv
+import io
+import json
+import re
+from itertools import islice
+from typing import AsyncIterator, Iterator
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError
+
+from app.products.dao import ProductDAO
+from app.products.schemas import SProductImport, SProductPrice
+
+EXPORT_FIELDS = ['id', 'name', 'description', 'price']
+JSON_CHUNK_SIZE = 64 * 1024
+UNDECODABLE = re.compile('[\udc80-\udcff]')
+
+
+class ImportFileError(ValueError):
+    def __init__(self, message: str, offset: int | None = None):
+        super().__init__(message)
+        self.offset = offset
+
+
+def read_json_values(text: io.TextIOBase, chunk_size: int = JSON_CHUNK_SIZE) -> Iterator:
+    decoder = json.JSONDecoder()
+    buffer, base, pos, eof = '', 0, 0, False
+
+    def refill() -> bool:
+        nonlocal buffer, base, pos, eof
+        chunk = text.read(chunk_size)
+        eof = not chunk
+        buffer, base, pos = buffer[pos:] + chunk, base + pos, 0
+        return not eof
+
+    def peek() -> str:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer) or not refill():
+                return buffer[pos:pos + 1]
+
+    def decode():
+        nonlocal pos
+        peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError as e:
+                offset = base + e.pos
+                if refill():
+                    continue
+                raise ImportFileError(f'Invalid JSON: {e.msg}', offset) from e
+            if end == len(buffer) and refill():
+                continue
+            pos = end
+            return value
+
+    first = peek()
+    if first != '[':
+        if first:
+            yield decode()
+            if peek():
+                raise ImportFileError('Invalid JSON: Extra data', base + pos)
+        return
+    pos += 1
+    if peek() == ']':
+        pos += 1
+        return
+    while True:
+        yield decode()
+        separator = peek()
+        pos += 1
+        if separator == ']':
+            return
+        if separator != ',':
+            raise ImportFileError("Invalid JSON: Expecting ',' or ']'", base + pos - 1)
+
+
+def _read_rows(text: io.TextIOBase, file: UploadFile) -> Iterator[tuple[int, dict | None, str | None]]:
+    filename = (file.filename or '').lower()
+    if filename.endswith('.csv') or file.content_type == 'text/csv':
+        for number, row in enumerate(csv.DictReader(text), start=1):
+            yield number, {key: value for key, value in row.items() if value not in ('', None)}, None
+    elif filename.endswith('.json') or file.content_type == 'application/json':
+        for number, row in enumerate(read_json_values(text), start=1):
+            yield number, row, None
+    else:
+        for number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield number, json.loads(line), None
+            except json.JSONDecodeError as e:
+                yield number, None, f'Invalid JSON: {e.msg}'
+
+
+def has_undecodable_text(value) -> bool:
+    if isinstance(value, str):
+        return UNDECODABLE.search(value) is not None
+    if isinstance(value, dict):
+        return any(has_undecodable_text(key) or has_undecodable_text(item) for key, item in value.items())
+    if isinstance(value, list):
+        return any(has_undecodable_text(item) for item in value)
+    return False
+
+
+def invalid_file(row: int, message: str, offset: int | None = None) -> HTTPException:
+    detail = {'row': row, 'errors': [message]}
+    if offset is not None:
+        detail['offset'] = offset
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def read_import_rows(file: UploadFile) -> Iterator[tuple[int, dict | None, str | None]]:
+    text = io.TextIOWrapper(file.file, encoding='utf-8-sig', errors='surrogateescape', newline='')
+    number = 0
+    try:
+        for number, row, error in _read_rows(text, file):
+            if has_undecodable_text(row):
+                raise invalid_file(number, 'File is not valid UTF-8')
+            yield number, row, error
+    except ImportFileError as e:
+        raise invalid_file(number + 1, str(e), e.offset) from e
+    except csv.Error as e:
+        raise invalid_file(number + 1, f'Invalid CSV: {e}') from e
+
+
+def validate_rows(rows, schema: type[BaseModel], report: dict) -> list[tuple[int, BaseModel]]:
+    valid = []
+    for number, row, error in rows:
+        if error is not None:
+            report['errors'].append({'row': number, 'errors': [error]})
+            continue
+        try:
+            valid.append((number, schema.model_validate(row)))
+        except ValidationError as e:
+            report['errors'].append({'row': number, 'errors': [err['msg'] for err in e.errors()]})
+    return valid
+
+
+async def _apply_product_batch(batch: list[tuple[int, SProductImport]], supplier_id: int, report: dict):
+    existing = await ProductDAO.get_existing_ids([row.id for _, row in batch if row.id is not None], supplier_id=supplier_id)
+    inserts, updates = [], []
+    for number, row in batch:
+        values = row.model_dump(exclude_none=True)
+        if row.id is None:
+            inserts.append({**values, 'supplier_id': supplier_id})
+        elif row.id in existing:
+            updates.append(values)
+        else:
+            report['errors'].append({'row': number, 'errors': [f'Product with id {row.id} not found!']})
+    report['inserted'] += len(await ProductDAO.add_many(inserts))
+    await ProductDAO.update_many(updates, supplier_id=supplier_id)
+    report['updated'] += len(updates)
+
+
+async def import_products(file: UploadFile, supplier_id: int, batch_size: int) -> dict:
+    report = {'inserted': 0, 'updated': 0, 'errors': []}
+    rows = read_import_rows(file)
+    while batch := await run_in_threadpool(lambda: list(islice(rows, batch_size))):
+        await _apply_product_batch(validate_rows(batch, SProductImport, report), supplier_id, report)
+    return report
+
+
+async def update_prices(rows: list, supplier_id: int) -> dict:
+    report = {'updated': 0, 'errors': []}
+    valid = validate_rows(((number, row, None) for number, row in enumerate(rows, start=1)), SProductPrice, report)
+    existing = await ProductDAO.get_existing_ids([row.id for _, row in valid], supplier_id=supplier_id)
+    updates = []
+    for number, row in valid:
+        if row.id in existing:
+            updates.append(row.model_dump())
+        else:
+            report['errors'].append({'row': number, 'errors': [f'Product with id {row.id} not found!']})
+    await ProductDAO.update_many(updates, supplier_id=supplier_id)
+    report['updated'] = len(updates)
+    return report
+
+
+async def export_csv(products: AsyncIterator) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    async for product in products:
+        writer.writerow([getattr(product, field) for field in EXPORT_FIELDS])
+        if buffer.tell() > 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,59 @@
+from datetime import datetime
+from functools import partial
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response, status
+
+from app.base.cache import LRUCache
+from app.base.http_cache import cache_headers, is_not_modified, make_etag
+from app.config import get_catalog_cache_config
+from app.database import after_commit, primary_reads
+from app.products.dao import CatalogVersionDAO
+
+
+class CatalogCache:
+    def __init__(self, version_size: int, version_ttl: float, response_size: int):
+        self._versions = LRUCache(version_size, version_ttl)
+        self._responses = LRUCache(response_size)
+
+    async def version(self, supplier_id: int) -> tuple[int, datetime | None]:
+        version = self._versions.get(supplier_id)
+        if version is None:
+            with primary_reads():
+                version = await CatalogVersionDAO.get_version(supplier_id)
+            self._versions.set(supplier_id, version)
+        return version
+
+    async def bump(self, supplier_id: int):
+        version = await CatalogVersionDAO.bump(supplier_id)
+        await after_commit(partial(self._advance, supplier_id, version))
+
+    def _advance(self, supplier_id: int, version: tuple[int, datetime]):
+        current = self._versions.get(supplier_id)
+        if current is None or current[0] < version[0]:
+            self._versions.set(supplier_id, version)
+        self._responses.clear(f'{supplier_id}:')
+
+    async def respond(self, request: Request, supplier_id: int, key: str, load: Callable[[], Awaitable[bytes]]) -> Response:
+        version, last_modified = await self.version(supplier_id)
+        etag = make_etag('catalog', supplier_id, version, key)
+        headers = cache_headers(etag, last_modified)
+        if is_not_modified(request, etag, last_modified):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        cache_key = f'{supplier_id}:{key}'
+        cached = self._responses.get(cache_key)
+        if cached is not None and cached[0] == version:
+            body = cached[1]
+        else:
+            with primary_reads():
+                body = await load()
+            self._responses.set(cache_key, (version, body))
+        return Response(body, media_type='application/json', headers=headers)
+
+
+def create_catalog_cache() -> CatalogCache:
+    catalog_config = get_catalog_cache_config()
+    return CatalogCache(catalog_config['version_size'], catalog_config['version_ttl'], catalog_config['response_size'])
+
+
+catalog_cache = create_catalog_cache()
@@ -1,6 +1,132 @@
-from app.base.dao import BaseDAO
-from app.products.models import Product
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy import func, literal_column, select, delete as sqlalchemy_delete, insert as sqlalchemy_insert
+
+from app.base.dao import BaseDAO, dialect_insert
+from app.dashboard.dao import SupplierDashboardDAO
+from app.database import session_scope, on_commit
+from app.products.models import CatalogVersion, Product, product_search_vector
+from app.products.search import local_search_enabled, local_search_index, prefix_tsquery, search_terms
 
 
 class ProductDAO(BaseDAO):
     model = Product
+    cache_by_id = True
+
+    @classmethod
+    def _mark_write(cls, session, filter_by: dict):
+        super()._mark_write(session, filter_by)
+        on_commit(session, local_search_index.invalidate)
+
+    @classmethod
+    async def _count_products(cls, session, supplier_ids: list[int], sign: int):
+        counts = Counter(supplier_ids)
+        await SupplierDashboardDAO.adjust(session, {supplier_id: {'product_count': sign * n} for supplier_id, n in counts.items()})
+
+    @classmethod
+    async def add(cls, **values):
+        async with session_scope() as session:
+            new_instance = cls.model(**values)
+            session.add(new_instance)
+            await session.flush()
+            await cls._count_products(session, [new_instance.supplier_id], 1)
+            cls._mark_write(session, {'id': new_instance.id})
+            return new_instance
+
+    @classmethod
+    async def delete(cls, delete_all: bool = False, **filter_by):
+        if not delete_all and not filter_by:
+            raise ValueError("Need at least one parameter to delete!")
+
+        async with session_scope() as session:
+            products = cls.model.__table__
+            query = sqlalchemy_delete(products).filter_by(**filter_by).returning(products.c.supplier_id)
+            result = await session.execute(query)
+            await cls._count_products(session, result.scalars().all(), -1)
+            cls._mark_write(session, filter_by)
+            return result
+
+    @classmethod
+    async def add_many(cls, rows: list[dict]) -> list[int]:
+        if not rows:
+            return []
+        async with session_scope() as session:
+            query = sqlalchemy_insert(cls.model).returning(cls.model.id, cls.model.supplier_id, sort_by_parameter_order=True)
+            inserted = (await session.execute(query, rows)).all()
+            await cls._count_products(session, [row.supplier_id for row in inserted], 1)
+            cls._mark_write(session, {})
+            return [row.id for row in inserted]
+
+    @classmethod
+    async def delete_many(cls, ids: list[int], **filter_by) -> list[int]:
+        if not ids:
+            return []
+        async with session_scope() as session:
+            query = sqlalchemy_delete(cls.model).where(cls.model.id.in_(ids)).filter_by(**filter_by).returning(
+                cls.model.id, cls.model.supplier_id
+            )
+            deleted = (await session.execute(query)).all()
+            await cls._count_products(session, [row.supplier_id for row in deleted], -1)
+            cls._mark_write(session, {})
+            return [row.id for row in deleted]
+
+    @classmethod
+    async def search(cls, supplier_ids: set[int], q: str | None = None, supplier_id: int | None = None,
+                     min_price: int | None = None, max_price: int | None = None, sort: str = 'relevance',
+                     limit: int = 20, offset: int = 0) -> tuple[list[Product], dict[int, int]]:
+        if not supplier_ids:
+            return [], {}
+        terms = search_terms(q)
+        if local_search_enabled():
+            return await local_search_index.search(terms, supplier_ids, supplier_id, min_price, max_price, sort, limit, offset)
+
+        filters = [cls.model.supplier_id.in_(supplier_ids)]
+        if min_price is not None:
+            filters.append(cls.model.price >= min_price)
+        if max_price is not None:
+            filters.append(cls.model.price <= max_price)
+        order_by = [cls.model.id]
+        if terms:
+            tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), prefix_tsquery(terms))
+            filters.append(product_search_vector.bool_op('@@')(tsquery))
+            order_by = [func.ts_rank(product_search_vector, tsquery).desc(), cls.model.id]
+        order_by = {
+            'price_asc': [cls.model.price, cls.model.id],
+            'price_desc': [cls.model.price.desc(), cls.model.id],
+            'newest': [cls.model.created_at.desc(), cls.model.id.desc()],
+            'name': [cls.model.name, cls.model.id],
+        }.get(sort, order_by)
+
+        items_query = select(cls.model).where(*filters)
+        if supplier_id is not None:
+            items_query = items_query.where(cls.model.supplier_id == supplier_id)
+        items_query = items_query.order_by(*order_by).limit(limit).offset(offset)
+        facets_query = select(cls.model.supplier_id, func.count()).where(*filters).group_by(cls.model.supplier_id)
+        async with session_scope() as session:
+            items = (await session.execute(items_query)).scalars().all()
+            facets = dict((await session.execute(facets_query)).all())
+        return items, facets
+
+
+class CatalogVersionDAO(BaseDAO):
+    model = CatalogVersion
+
+    @classmethod
+    async def get_version(cls, supplier_id: int) -> tuple[int, datetime | None]:
+        row = await cls.get_one_or_none(supplier_id=supplier_id)
+        if row is None:
+            return 0, None
+        return row.version, row.updated_at
+
+    @classmethod
+    async def bump(cls, supplier_id: int) -> tuple[int, datetime]:
+        query = dialect_insert(cls.model).values(supplier_id=supplier_id, version=1)
+        query = query.on_conflict_do_update(
+            index_elements=[cls.model.supplier_id],
+            set_={'version': cls.model.version + 1, 'updated_at': func.now()},
+        ).returning(cls.model.version, cls.model.updated_at)
+        async with session_scope() as session:
+            row = (await session.execute(query)).one()
+            cls._mark_write(session, {'supplier_id': supplier_id})
+        return row.version, row.updated_at
@@ -1,10 +1,19 @@
-from sqlalchemy import ForeignKey, text, Text
+from sqlalchemy import ForeignKey, Index, text, Text, func, literal_column
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.database import Base, str_uniq, int_pk, str_null_true
 from datetime import date
 
 
 class Product(Base):
+    __table_args__ = (
+        Index('ix_products_supplier_id_id', 'supplier_id', 'id'),
+        Index('ix_products_supplier_id_price', 'supplier_id', 'price'),
+        Index(
+            'ix_products_search_vector', text("to_tsvector('simple'::regconfig, (name::text || ' '::text) || description::text)"),
+            postgresql_using='gin',
+        ).ddl_if(dialect='postgresql'),
+    )
+
     id: Mapped[int_pk]
     name: Mapped[str]
     description: Mapped[str]
@@ -17,3 +26,13 @@ class Product(Base):
 
     def __repr__(self):
         return str(self)
+
+
+class CatalogVersion(Base):
+    supplier_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    version: Mapped[int] = mapped_column(nullable=False, default=0, server_default=text('0'))
+
+
+product_search_vector = func.to_tsvector(
+    literal_column("'simple'::regconfig"), Product.name + literal_column("' '") + Product.description
+)
@@ -1,3 +1,8 @@
+from typing import Literal
+
+from fastapi import Query
+
+
 class RBProduct:
     def __init__(self, id: int | None = None, name: str | None = None, supplier_id: int | None = None):
         self.id = id
@@ -12,3 +17,34 @@ class RBProduct:
 		}
         filtered_data = {key: value for key, value in data.items() if value is not None}
         return filtered_data
+
+
+class RBProductSearch:
+    def __init__(
+        self,
+        q: str | None = Query(None, max_length=200),
+        supplier_id: int | None = None,
+        min_price: int | None = Query(None, ge=0),
+        max_price: int | None = Query(None, ge=0),
+        sort: Literal['relevance', 'price_asc', 'price_desc', 'newest', 'name'] = 'relevance',
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0, le=10000),
+    ):
+        self.q = q
+        self.supplier_id = supplier_id
+        self.min_price = min_price
+        self.max_price = max_price
+        self.sort = sort
+        self.limit = limit
+        self.offset = offset
+
+    def to_dict(self) -> dict:
+        return {
+            'q': self.q,
+            'supplier_id': self.supplier_id,
+            'min_price': self.min_price,
+            'max_price': self.max_price,
+            'sort': self.sort,
+            'limit': self.limit,
+            'offset': self.offset,
+        }
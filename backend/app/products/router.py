@@ -1,39 +1,78 @@
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Literal
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from app.config import settings
+from app.products.bulk import import_products, update_prices, export_csv
+from app.products.catalog import catalog_cache
 from app.products.dao import ProductDAO
-from app.products.schemas import SProduct, SProductAdd, SProductUpdate
-from app.products.rb import RBProduct
-from app.users.models import User
-from app.users.dependecies import get_current_user
+from app.products.schemas import SProduct, SProductAdd, SProductUpdate, SProductBulkDelete, SProductSearch, SSupplierFacet
+from app.products.rb import RBProduct, RBProductSearch
+from app.base.admission import rate_limiter, shed_load
+from app.base.http_cache import conditional_response, make_etag
+from app.base.pagination import RBPage, SPage, stream_response, schema_serializer
+from app.users.schemas import SUserClaims
+from app.users.dependecies import get_current_principal, principal_key
+from app.links.access import link_access
 from app.links.dao import LinkDAO
 
 router = APIRouter(prefix='/products', tags=['Product endpoints'])
 
-@router.get("/supplier/{supplier_id}/", summary="Get products")
-async def get_products(supplier_id: int, request_body: RBProduct = Depends(), current_user: User = Depends(get_current_user)):
-    if current_user.id == supplier_id or current_user.supplier_owner_id == supplier_id:
-    	return await ProductDAO.get_all(**request_body.to_dict())
-    link = await LinkDAO.get_one_or_none(supplier_id=supplier_id, consumer_id=current_user.id)
-    if link:
-        return await ProductDAO.get_all(**request_body.to_dict())
-    return {'message': 'Access denied!'}
+product_list = TypeAdapter(list[SProduct])
+
+catalog_admission = [Depends(rate_limiter.limit('catalog', principal_key)), Depends(shed_load)]
+
+@router.get("/supplier/{supplier_id}/", summary="Get products", dependencies=catalog_admission)
+async def get_products(supplier_id: int, request: Request, request_body: RBProduct = Depends(), page: RBPage = Depends(), current_user: SUserClaims = Depends(get_current_principal)) -> list[SProduct] | SPage[SProduct] | dict:
+    if current_user.id != supplier_id and current_user.supplier_owner_id != supplier_id:
+        if not await link_access.has_access(supplier_id, current_user.id):
+            return {'message': 'Access denied!'}
+    filter_by = {**request_body.to_dict(), 'supplier_id': supplier_id}
+    if page.stream:
+        products = ProductDAO.stream_all(order_by=page.order_by, descending=page.descending, **filter_by)
+        return stream_response(products, page.stream, schema_serializer(SProduct))
+
+    async def load() -> bytes:
+        if page.is_paginated:
+            items, next_cursor = await ProductDAO.get_page(**page.to_dict(), **filter_by)
+            return SPage[SProduct](items=items, next_cursor=next_cursor).model_dump_json().encode()
+        return product_list.dump_json(product_list.validate_python(await ProductDAO.get_all(**filter_by), from_attributes=True))
+
+    key = repr(sorted({**filter_by, **(page.to_dict() if page.is_paginated else {})}.items()))
+    return await catalog_cache.respond(request, supplier_id, key, load)
+
 
 
+@router.get("/search/", summary="Search products of linked suppliers", dependencies=catalog_admission)
+async def search_products(search: RBProductSearch = Depends(), current_user: SUserClaims = Depends(get_current_principal)) -> SProductSearch:
+    if current_user.is_consumer:
+        supplier_ids = await LinkDAO.get_approved_supplier_ids(current_user.id)
+    else:
+        supplier_ids = {current_user.supplier_owner_id or current_user.id}
+    items, facets = await ProductDAO.search(supplier_ids, **search.to_dict())
+    total = facets.get(search.supplier_id, 0) if search.supplier_id is not None else sum(facets.values())
+    return SProductSearch(
+        items=items,
+        total=total,
+        facets=[SSupplierFacet(supplier_id=supplier_id, count=count) for supplier_id, count in sorted(facets.items())],
+    )
 
-@router.get("/{id}", summary="Get one product by id")
-async def get_product_by_id(id: int, current_user: User = Depends(get_current_user)) -> SProduct | dict:
+
+@router.get("/{id}", summary="Get one product by id", dependencies=catalog_admission)
+async def get_product_by_id(id: int, request: Request, current_user: SUserClaims = Depends(get_current_principal)) -> SProduct | dict:
     result = await ProductDAO.get_one_or_none_by_id(id)
-    if result:
-        supplier_id = result.supplier_id
-        if current_user.id == supplier_id or current_user.supplier_owner_id == supplier_id:
-            return result
-        link = await LinkDAO.get_one_or_none(supplier_id=supplier_id, consumer_id=current_user.id)
-        if link:
-            return result
-        return {'message': 'Access denied!'}
-    return {'message': f'Product with id {id} not found!'}
+    if not result:
+        return {'message': f'Product with id {id} not found!'}
+    supplier_id = result.supplier_id
+    if current_user.id != supplier_id and current_user.supplier_owner_id != supplier_id:
+        if not await link_access.has_access(supplier_id, current_user.id):
+            return {'message': 'Access denied!'}
+    etag = make_etag('product', result.id, result.updated_at)
+    return conditional_response(request, etag, result.updated_at, SProduct.model_validate(result).model_dump_json().encode())
 
 @router.post("/add")
-async def add_product(product: SProductAdd, current_user: User = Depends(get_current_user)) -> dict:
+async def add_product(product: SProductAdd, current_user: SUserClaims = Depends(get_current_principal)) -> dict:
     if current_user.is_consumer or current_user.is_supplier_repr:
         return {'meesage': 'Only supplier owners or managers can create product!'}
     supplier_id = current_user.id
@@ -43,11 +82,12 @@ async def add_product(product: SProductAdd, current_user: User = Depends(get_cur
     product_dict['supplier_id'] = supplier_id
     result = await ProductDAO.add(**product_dict)
     if result:
+        await catalog_cache.bump(supplier_id)
         return {'message': 'Product added succecfully!', 'product': product}
     return {'message': 'Failed to add product!'}
 
 @router.put("/update/{id}")
-async def update(id: int, product: SProductUpdate, current_user: User = Depends(get_current_user)) -> dict:
+async def update(id: int, product: SProductUpdate, current_user: SUserClaims = Depends(get_current_principal)) -> dict:
     if current_user.is_consumer or current_user.is_supplier_repr:
         return {'meesage': 'Only supplier owners or managers can update products!'}
     supplier_id = current_user.id
@@ -61,12 +101,14 @@ async def update(id: int, product: SProductUpdate, current_user: User = Depends(
     if len(filtered_data) == 0:
         raise HTTPException(400, "No fields to update!")
     result = await ProductDAO.update(filter_by={"id": id}, **filtered_data)
+    if result.rowcount:
+        await catalog_cache.bump(supplier_id)
     if result:
         return {'message': 'Product sucsessfully updated!'}
     return {'message': 'Product failed to update!'}
 
 @router.delete("/delete/{id}")
-async def delete(id: int, current_user: User = Depends(get_current_user)) -> dict:
+async def delete(id: int, current_user: SUserClaims = Depends(get_current_principal)) -> dict:
     if current_user.is_consumer or current_user.is_supplier_repr:
         return {'meesage': 'Only supplier owners or managers can delete products!'}
     supplier_id = current_user.id
@@ -76,6 +118,56 @@ async def delete(id: int, current_user: User = Depends(get_current_user)) -> dic
     if p and p.supplier_id != supplier_id:
         return {'message': 'Only supplier owners or managers can delete product!'}
     result = await ProductDAO.delete(id=id)
+    if result.rowcount:
+        await catalog_cache.bump(supplier_id)
     if result:
         return {'message': f'Product with id {id} deleted succesfully!'}
     return {'message': 'Failed to delete product!'}
+
+@router.post("/bulk/import", summary="Import products from CSV, JSON or NDJSON")
+async def bulk_import(file: UploadFile, current_user: SUserClaims = Depends(get_current_principal)) -> dict:
+    if current_user.is_consumer or current_user.is_supplier_repr:
+        return {'message': 'Only supplier owners or managers can import products!'}
+    supplier_id = current_user.id
+    if current_user.is_supplier_manager:
+        supplier_id = current_user.supplier_owner_id
+    report = await import_products(file, supplier_id, settings.BULK_BATCH_SIZE)
+    if report['inserted'] or report['updated']:
+        await catalog_cache.bump(supplier_id)
+    return report
+
+@router.put("/bulk/prices", summary="Update prices of many products")
+async def bulk_update_prices(rows: list = Body(...), current_user: SUserClaims = Depends(get_current_principal)) -> dict:
+    if current_user.is_consumer or current_user.is_supplier_repr:
+        return {'message': 'Only supplier owners or managers can update products!'}
+    supplier_id = current_user.id
+    if current_user.is_supplier_manager:
+        supplier_id = current_user.supplier_owner_id
+    report = await update_prices(rows, supplier_id)
+    if report['updated']:
+        await catalog_cache.bump(supplier_id)
+    return report
+
+@router.delete("/bulk", summary="Delete many products")
+async def bulk_delete(body: SProductBulkDelete, current_user: SUserClaims = Depends(get_current_principal)) -> dict:
+    if current_user.is_consumer or current_user.is_supplier_repr:
+        return {'message': 'Only supplier owners or managers can delete products!'}
+    supplier_id = current_user.id
+    if current_user.is_supplier_manager:
+        supplier_id = current_user.supplier_owner_id
+    deleted = await ProductDAO.delete_many(body.ids, supplier_id=supplier_id)
+    if deleted:
+        await catalog_cache.bump(supplier_id)
+    missing = sorted(set(body.ids) - set(deleted))
+    return {'deleted': len(deleted), 'errors': [{'id': id, 'errors': [f'Product with id {id} not found!']} for id in missing]}
+
+@router.get("/bulk/export", summary="Export the supplier catalog")
+async def bulk_export(format: Literal['csv', 'ndjson'] = 'csv', current_user: SUserClaims = Depends(get_current_principal)):
+    if current_user.is_consumer:
+        return {'message': 'Only suppliers can export products!'}
+    supplier_id = current_user.supplier_owner_id or current_user.id
+    products = ProductDAO.stream_all(supplier_id=supplier_id)
+    if format == 'ndjson':
+        return stream_response(products, 'ndjson', schema_serializer(SProduct))
+    headers = {'Content-Disposition': f'attachment; filename="products-{supplier_id}.csv"'}
+    return StreamingResponse(export_csv(products), media_type='text/csv', headers=headers)
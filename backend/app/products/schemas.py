@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel, Field, ConfigDict
 
 
@@ -8,6 +10,8 @@ class SProduct(BaseModel):
     description: str | None = Field(None)
     price: int = Field(..., ge=0)
     supplier_id: int = Field(..., ge=1)
+    created_at: datetime | None = Field(None)
+    updated_at: datetime | None = Field(None)
 
 
 class SProductAdd(BaseModel):
@@ -20,3 +24,27 @@ class SProductUpdate(BaseModel):
     name: str | None = Field(None)
     description: str | None = Field(None)
     price: int | None = Field(None, ge=0)
+
+
+class SProductImport(SProductAdd):
+    id: int | None = Field(None, ge=1)
+
+
+class SProductPrice(BaseModel):
+    id: int = Field(..., ge=1)
+    price: int = Field(..., ge=0)
+
+
+class SProductBulkDelete(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=100)
+
+
+class SSupplierFacet(BaseModel):
+    supplier_id: int
+    count: int
+
+
+class SProductSearch(BaseModel):
+    items: list[SProduct]
+    total: int
+    facets: list[SSupplierFacet]
@@ -0,0 +1,101 @@
+import asyncio
+import bisect
+import re
+from collections import Counter
+
+from sqlalchemy import select
+
+from app.config import get_search_config
+from app.database import async_session_maker, engine
+from app.products.models import Product
+
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+
+def search_terms(q: str | None) -> list[str]:
+    return TOKEN_RE.findall(q.lower()) if q else []
+
+
+def prefix_tsquery(terms: list[str]) -> str:
+    return ' & '.join(f"{term}:*" for term in terms)
+
+
+def local_search_enabled() -> bool:
+    backend = get_search_config()['backend']
+    if backend == 'auto':
+        return engine.dialect.name != 'postgresql'
+    return backend == 'local'
+
+
+SORT_KEYS = {
+    'price_asc': lambda product: (product.price, product.id),
+    'price_desc': lambda product: (-product.price, product.id),
+    'newest': lambda product: (-product.created_at.timestamp(), -product.id),
+    'name': lambda product: (product.name, product.id),
+}
+
+
+class LocalSearchIndex:
+    def __init__(self):
+        self._products: dict[int, Product] | None = None
+        self._tokens: list[tuple[str, int]] = []
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self):
+        self._generation += 1
+        self._products = None
+
+    async def _load(self) -> tuple[dict[int, Product], list[tuple[str, int]]]:
+        async with self._lock:
+            if self._products is not None:
+                return self._products, self._tokens
+            generation = self._generation
+            products, tokens = {}, []
+            async with async_session_maker() as session:
+                result = await session.stream_scalars(select(Product).execution_options(yield_per=1000))
+                async for product in result:
+                    products[product.id] = product
+                    tokens.extend((token, product.id) for token in set(search_terms(f"{product.name} {product.description}")))
+            tokens.sort()
+            if generation == self._generation:
+                self._products, self._tokens = products, tokens
+            return products, tokens
+
+    @staticmethod
+    def _prefix_matches(tokens: list[tuple[str, int]], term: str) -> set[int]:
+        ids = set()
+        for index in range(bisect.bisect_left(tokens, (term,)), len(tokens)):
+            token, product_id = tokens[index]
+            if not token.startswith(term):
+                break
+            ids.add(product_id)
+        return ids
+
+    async def search(self, terms: list[str], supplier_ids: set[int], supplier_id: int | None = None,
+                     min_price: int | None = None, max_price: int | None = None, sort: str = 'relevance',
+                     limit: int = 20, offset: int = 0) -> tuple[list[Product], dict[int, int]]:
+        products, tokens = await self._load()
+        candidates = products.values()
+        if terms:
+            ids = set.intersection(*[self._prefix_matches(tokens, term) for term in terms])
+            candidates = [products[product_id] for product_id in ids]
+        matched = [
+            product for product in candidates
+            if product.supplier_id in supplier_ids
+            and (min_price is None or product.price >= min_price)
+            and (max_price is None or product.price <= max_price)
+        ]
+        facets = Counter(product.supplier_id for product in matched)
+        if supplier_id is not None:
+            matched = [product for product in matched if product.supplier_id == supplier_id]
+        if sort in SORT_KEYS:
+            matched.sort(key=SORT_KEYS[sort])
+        else:
+            matched.sort(key=lambda product: (-sum(
+                any(token.startswith(term) for token in search_terms(product.name)) for term in terms
+            ), product.id))
+        return matched[offset:offset + limit], dict(facets)
+
+
+local_search_index = LocalSearchIndex()
@@ -1,25 +1,115 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 from jose import jwt
 
-from app.config import get_auth_data
+from app.base.cache import LRUCache
+from app.config import get_auth_data, get_hash_pool_config, get_token_config
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+_hash_executor: Executor | None = None
+_hash_pending = 0
+
+verified_tokens = LRUCache(maxsize=10000)
+revoked_access_tokens = LRUCache(maxsize=100000)
+
+
+def get_user_claims(user) -> dict:
+    claims = {"sub": str(user.id)}
+    if get_token_config()['claims']:
+        claims.update({
+            "is_consumer": user.is_consumer,
+            "is_supplier_owner": user.is_supplier_owner,
+            "is_supplier_manager": user.is_supplier_manager,
+            "is_supplier_repr": user.is_supplier_repr,
+            "supplier_owner_id": user.supplier_owner_id,
+        })
+    return claims
+
 
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
-    expire = datetime.now(timezone.utc) + timedelta(days=30)
-    to_encode.update({"exp": expire})
+    expire = datetime.now(timezone.utc) + timedelta(minutes=get_token_config()['access_expire_minutes'])
+    to_encode.update({"exp": expire, "jti": uuid4().hex, "type": "access"})
     auth_data = get_auth_data()
     encode_jwt = jwt.encode(to_encode, auth_data['secret_key'], algorithm=auth_data['algorithm'])
     return encode_jwt
 
 
+def create_refresh_token(user_id: int) -> tuple[str, str, datetime]:
+    jti = uuid4().hex
+    expire = datetime.now(timezone.utc) + timedelta(days=get_token_config()['refresh_expire_days'])
+    auth_data = get_auth_data()
+    to_encode = {"sub": str(user_id), "exp": expire, "jti": jti, "type": "refresh"}
+    encode_jwt = jwt.encode(to_encode, auth_data['secret_key'], algorithm=auth_data['algorithm'])
+    return encode_jwt, jti, expire.replace(tzinfo=None)
+
+
+def revoke_access_token(payload: dict):
+    ttl = payload['exp'] - datetime.now(timezone.utc).timestamp()
+    if payload.get('jti') and ttl > 0:
+        revoked_access_tokens.set(payload['jti'], True, ttl=ttl)
+
+
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def get_hash_executor() -> Executor:
+    global _hash_executor
+    if _hash_executor is None:
+        pool_config = get_hash_pool_config()
+        if pool_config['executor'] == 'process':
+            _hash_executor = ProcessPoolExecutor(max_workers=pool_config['workers'])
+        else:
+            _hash_executor = ThreadPoolExecutor(max_workers=pool_config['workers'], thread_name_prefix='bcrypt')
+    return _hash_executor
+
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True, cancel_futures=True)
+        _hash_executor = None
+
+
+async def _run_in_hash_pool(func, *args):
+    global _hash_pending
+    if _hash_pending >= get_hash_pool_config()['queue_limit']:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Too many authentication requests, try again later!',
+            headers={'Retry-After': '1'},
+        )
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def get_password_hashes_async(passwords: list[str]) -> list[str]:
+    workers = get_hash_pool_config()['workers']
+    hashes = []
+    for start in range(0, len(passwords), workers):
+        chunk = passwords[start:start + workers]
+        hashes.extend(await asyncio.gather(*[_run_in_hash_pool(get_password_hash, password) for password in chunk]))
+    return hashes
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
@@ -1,6 +1,47 @@
-from app.base.dao import BaseDAO
-from app.users.models import User
+from datetime import datetime, timezone
+
+from sqlalchemy import delete as sqlalchemy_delete
+
+from app.base.dao import BaseDAO, dialect_insert
+from app.database import session_scope
+from app.users.models import User, RefreshToken
 
 
 class UserDAO(BaseDAO):
     model = User
+    cache_by_id = True
+
+    @classmethod
+    async def add_if_absent(cls, **values) -> int | None:
+        query = dialect_insert(cls.model).values(**values).on_conflict_do_nothing(
+            index_elements=[cls.model.email]
+        ).returning(cls.model.id)
+        async with session_scope() as session:
+            user_id = (await session.execute(query)).scalar_one_or_none()
+            cls._mark_write(session, {'id': user_id})
+            return user_id
+
+    @classmethod
+    async def add_many_if_absent(cls, rows: list[dict]) -> dict[str, int]:
+        if not rows:
+            return {}
+        query = dialect_insert(cls.model).on_conflict_do_nothing(
+            index_elements=[cls.model.email]
+        ).returning(cls.model.id, cls.model.email)
+        async with session_scope() as session:
+            result = await session.execute(query, rows)
+            cls._mark_write(session, {})
+            return {row.email: row.id for row in result}
+
+
+class RefreshTokenDAO(BaseDAO):
+    model = RefreshToken
+
+    @classmethod
+    async def delete_expired(cls, user_id: int) -> int:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        query = sqlalchemy_delete(cls.model).where(cls.model.user_id == user_id, cls.model.expires_at < now)
+        async with session_scope() as session:
+            result = await session.execute(query)
+            cls._mark_write(session, {})
+            return result.rowcount
@@ -4,7 +4,9 @@ from fastapi import Request, HTTPException, status, Depends
 from jose import jwt, JWTError
 
 from app.config import get_auth_data
+from app.users.auth import verified_tokens, revoked_access_tokens
 from app.users.dao import UserDAO
+from app.users.schemas import SUserClaims
 
 
 def get_token(request: Request):
@@ -14,24 +16,61 @@ def get_token(request: Request):
     return token
 
 
-async def get_current_user(token: str = Depends(get_token)):
-    try:
-        auth_data = get_auth_data()
-        payload = jwt.decode(token, auth_data['secret_key'], algorithms=[auth_data['algorithm']])
-    except JWTError as e:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Not valid token!') from e
-    
-    expire = payload.get('exp')
-    expire_time = datetime.fromtimestamp(int(expire), tz=timezone.utc)
-    if (not expire) or (expire_time < datetime.now(timezone.utc)):
+def get_refresh_token(request: Request):
+    token = request.cookies.get('users_refresh_token')
+    if not token:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Refresh token not found!')
+    return token
+
+
+def decode_token(token: str, token_type: str = 'access') -> dict:
+    payload = verified_tokens.get(token)
+    if payload is None:
+        try:
+            auth_data = get_auth_data()
+            payload = jwt.decode(token, auth_data['secret_key'], algorithms=[auth_data['algorithm']])
+        except JWTError as e:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Not valid token!') from e
+
+        expire = payload.get('exp')
+        if not expire:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Token expired!')
+        verified_tokens.set(token, payload, ttl=int(expire) - datetime.now(timezone.utc).timestamp())
+
+    expire_time = datetime.fromtimestamp(int(payload['exp']), tz=timezone.utc)
+    if expire_time < datetime.now(timezone.utc):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Token expired!')
-    
-    user_id = payload.get('sub')
-    if not user_id:
+
+    if payload.get('type', 'access') != token_type:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Not valid token!')
+
+    if token_type == 'access' and payload.get('jti') and revoked_access_tokens.get(payload['jti']):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Token revoked!')
+
+    if not payload.get('sub'):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Id of user not found!')
-    
-    user = await UserDAO.get_one_or_none_by_id(int(user_id))
+
+    return payload
+
+
+def get_token_payload(token: str = Depends(get_token)) -> dict:
+    return decode_token(token)
+
+
+async def get_current_user(payload: dict = Depends(get_token_payload)):
+    user = await UserDAO.get_one_or_none_by_id(int(payload['sub']))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='User not found!')
-    
+
     return user
+
+
+async def get_current_principal(payload: dict = Depends(get_token_payload)) -> SUserClaims:
+    if 'is_consumer' in payload:
+        return SUserClaims(id=int(payload['sub']), **payload)
+    user = await get_current_user(payload)
+    return SUserClaims.model_validate(user)
+
+
+def principal_key(current_user: SUserClaims = Depends(get_current_principal)) -> str:
+    return f'user:{current_user.id}'
@@ -0,0 +1,7 @@
+from app.jobs.queue import job_queue
+from app.users.dao import RefreshTokenDAO
+
+
+@job_queue.handler('users.prune_refresh_tokens')
+async def prune_refresh_tokens(user_id: int):
+    await RefreshTokenDAO.delete_expired(user_id)
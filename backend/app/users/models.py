@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from sqlalchemy import ForeignKey, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from app.database import Base, str_uniq, int_pk, str_null_true
@@ -22,3 +24,11 @@ class User(Base):
     supplier_owner: Mapped["User"] = relationship("User", remote_side="User.id", back_populates="team_members")
     
     team_members: Mapped[list["User"]] = relationship("User", back_populates="supplier_owner")
+
+
+class RefreshToken(Base):
+    id: Mapped[int_pk]
+    jti: Mapped[str_uniq]
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at: Mapped[datetime]
+    revoked: Mapped[bool] = mapped_column(default=False, server_default=text('false'), nullable=False)
@@ -0,0 +1,40 @@
+import asyncio
+from functools import partial
+
+from app.chat.broker import broker
+from app.database import after_commit
+from app.users.auth import revoke_access_token
+
+REVOKED_TOKENS_CHANNEL = 'auth:revoked_access_tokens'
+
+
+class TokenRevocations:
+    def __init__(self):
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+
+    async def revoke(self, payload: dict):
+        if not payload.get('jti'):
+            return
+        revoke_access_token(payload)
+        event = {'jti': payload['jti'], 'exp': payload['exp']}
+        await after_commit(partial(broker.publish, [REVOKED_TOKENS_CHANNEL], event))
+
+    async def _listen(self):
+        while True:
+            revoke_access_token(await self._queue.get())
+
+    async def start(self):
+        self._queue = broker.subscribe(REVOKED_TOKENS_CHANNEL)
+        self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        broker.unsubscribe(self._queue, REVOKED_TOKENS_CHANNEL)
+
+
+token_revocations = TokenRevocations()
@@ -1,48 +1,100 @@
-from fastapi import APIRouter, HTTPException, status, Response, Depends
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, HTTPException, status, Request, Response, Depends
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.users.auth import get_password_hash, verify_password, create_access_token
-from app.users.dao import UserDAO
-from app.users.schemas import SUserRegister, SUserAuth, SUserRegisterSM
-from app.users.dependecies import get_current_user
+from app.base.admission import rate_limiter, shed_load
+from app.database import get_session, primary_reads
+from app.jobs.queue import job_queue
+from app.users.auth import (
+    get_password_hash_async, get_password_hashes_async, verify_password_async, create_access_token, create_refresh_token,
+    get_user_claims,
+)
+from app.users.dao import UserDAO, RefreshTokenDAO
+from app.users.schemas import SUserRegister, SUserAuth, SUserRegisterSM, SUserRegisterSMBulk, SUser
+from app.users.dependecies import get_current_user, get_refresh_token, decode_token
 from app.users.models import User
+from app.users.revocations import token_revocations
+from app.users import jobs
 
 
 router = APIRouter(prefix='/auth', tags=['Auth endpoints'])
 
+auth_admission = [Depends(rate_limiter.limit('auth')), Depends(shed_load)]
+
 
-@router.post("/register/")
+@router.post("/register/", dependencies=auth_admission)
 async def register_user(user_data: SUserRegister) -> dict:
-    user = await UserDAO.get_one_or_none(email=user_data.email)
-    if user:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
     user_dict = user_data.model_dump()
-    user_dict['password'] = get_password_hash(user_data.password)
-    await UserDAO.add(**user_dict)
+    user_dict['password'] = await get_password_hash_async(user_data.password)
+    if await UserDAO.add_if_absent(**user_dict) is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
     return {'message': 'Successfully registered!'}
 
 async def authenticate_user(email: EmailStr, password: str):
-    user = await UserDAO.get_one_or_none(email=email)
-    if not user or verify_password(plain_password=password, hashed_password=user.password) is False:
+    with primary_reads():
+        user = await UserDAO.get_one_or_none(email=email)
+    if not user or await verify_password_async(plain_password=password, hashed_password=user.password) is False:
         return None
     return user
 
-@router.post("/login/")
-async def auth_user(response: Response, user_data: SUserAuth):
+async def issue_tokens(response: Response, user: User) -> dict:
+    access_token = create_access_token(get_user_claims(user))
+    refresh_token, jti, expires_at = create_refresh_token(user.id)
+    await RefreshTokenDAO.add(jti=jti, user_id=user.id, expires_at=expires_at)
+    await job_queue.enqueue('users.prune_refresh_tokens', user_id=user.id)
+    response.set_cookie(key="users_access_token", value=access_token, httponly=True)
+    response.set_cookie(key="users_refresh_token", value=refresh_token, httponly=True)
+    return {'access_token': access_token, 'refresh_token': refresh_token}
+
+@router.post("/login/", dependencies=auth_admission)
+async def auth_user(response: Response, user_data: SUserAuth) -> dict:
     user = await authenticate_user(email=user_data.email, password=user_data.password)
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Wrong email or password!")
-    access_token = create_access_token({"sub": str(user.id)})
-    response.set_cookie(key="users_access_token", value=access_token, httponly=True)
-    return {'access_token': access_token, 'refresh_token': None}
+    return await issue_tokens(response, user)
+
+@router.post("/refresh/", dependencies=auth_admission)
+async def refresh_tokens(response: Response, token: str = Depends(get_refresh_token), session: AsyncSession = Depends(get_session, scope="function")) -> dict:
+    payload = decode_token(token, token_type='refresh')
+    with primary_reads():
+        stored = await RefreshTokenDAO.get_one_or_none(jti=payload['jti'])
+    if not stored or stored.expires_at < datetime.now(timezone.utc).replace(tzinfo=None):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Refresh token expired!')
+    if stored.revoked:
+        await RefreshTokenDAO.update(filter_by={'user_id': stored.user_id}, revoked=True)
+        await session.commit()
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Refresh token reused, all sessions revoked!')
+
+    user = await UserDAO.get_one_or_none_by_id(stored.user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='User not found!')
+    result = await RefreshTokenDAO.update(filter_by={'id': stored.id, 'revoked': False}, revoked=True)
+    if not result.rowcount:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Refresh token already used!')
+    return await issue_tokens(response, user)
 
 @router.get("/me/")
-async def get_me(user_data: User = Depends(get_current_user)):
+async def get_me(user_data: User = Depends(get_current_user)) -> SUser:
     return user_data
 
 @router.post("/logout/")
-async def logout_user(response: Response):
+async def logout_user(request: Request, response: Response) -> dict:
+    for cookie, token_type in (('users_access_token', 'access'), ('users_refresh_token', 'refresh')):
+        token = request.cookies.get(cookie)
+        if not token:
+            continue
+        try:
+            payload = decode_token(token, token_type=token_type)
+        except HTTPException:
+            continue
+        if token_type == 'access':
+            await token_revocations.revoke(payload)
+        else:
+            await RefreshTokenDAO.update(filter_by={'jti': payload['jti']}, revoked=True)
     response.delete_cookie(key="users_access_token")
+    response.delete_cookie(key="users_refresh_token")
     return {'message': 'User successfully left the system!'}
 
 
@@ -51,14 +103,41 @@ async def register_supplier_member(user_data: SUserRegisterSM, current_user: Use
     if not current_user.is_supplier_owner:
         raise HTTPException(status_code=status.HTTP_405_METHOD_NOT_ALLOWED, detail="Only owners can register members!")
 
-    user = await UserDAO.get_one_or_none(email=user_data.email)
-    if user:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
-
     user_dict = user_data.model_dump()
-    user_dict['password'] = get_password_hash(user_data.password)
+    user_dict['password'] = await get_password_hash_async(user_data.password)
     user_dict['supplier_owner_id'] = current_user.id
     user_dict['is_consumer'] = False
 
-    await UserDAO.add(**user_dict)
+    if await UserDAO.add_if_absent(**user_dict) is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="User already exists")
     return {'message': 'Successfully registered!'}
+
+
+@router.post("/register_supplier_members/", summary="Register many supplier managers and representatives")
+async def register_supplier_members(body: SUserRegisterSMBulk, current_user: User = Depends(get_current_user)) -> dict:
+    if not current_user.is_supplier_owner:
+        raise HTTPException(status_code=status.HTTP_405_METHOD_NOT_ALLOWED, detail="Only owners can register members!")
+
+    report = {'inserted': 0, 'ids': [], 'errors': []}
+    members, seen = [], set()
+    for number, member in enumerate(body.members, start=1):
+        if member.email in seen:
+            report['errors'].append({'row': number, 'errors': ['Duplicate email in request']})
+            continue
+        seen.add(member.email)
+        members.append((number, member))
+
+    hashes = await get_password_hashes_async([member.password for _, member in members])
+    rows = [
+        {**member.model_dump(), 'password': password, 'supplier_owner_id': current_user.id, 'is_consumer': False}
+        for (_, member), password in zip(members, hashes)
+    ]
+    inserted = await UserDAO.add_many_if_absent(rows)
+    for number, member in members:
+        if member.email in inserted:
+            report['ids'].append(inserted[member.email])
+        else:
+            report['errors'].append({'row': number, 'errors': ['User already exists']})
+    report['inserted'] = len(report['ids'])
+    report['errors'].sort(key=lambda error: error['row'])
+    return report
@@ -1,4 +1,6 @@
-from pydantic import BaseModel, EmailStr, Field
+from datetime import datetime
+
+from pydantic import BaseModel, EmailStr, Field, ConfigDict
 
 
 class SUserRegister(BaseModel):
@@ -22,3 +24,31 @@ class SUserRegisterSM(BaseModel):
     last_name: str | None = Field(None)
     is_supplier_manager: bool = Field(...)
     is_supplier_repr: bool = Field(...)
+
+
+class SUserRegisterSMBulk(BaseModel):
+    members: list[SUserRegisterSM] = Field(..., min_length=1, max_length=100)
+
+
+class SUserClaims(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    is_consumer: bool
+    is_supplier_owner: bool
+    is_supplier_manager: bool
+    is_supplier_repr: bool
+    supplier_owner_id: int | None = None
+
+
+class SUser(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    id: int
+    email: str
+    first_name: str
+    last_name: str | None = None
+    is_consumer: bool
+    is_supplier_owner: bool
+    is_supplier_manager: bool
+    is_supplier_repr: bool
+    supplier_owner_id: int | None = None
+    created_at: datetime | None = None
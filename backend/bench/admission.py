@@ -0,0 +1,110 @@
+import argparse
+import asyncio
+import sys
+import time
+
+import httpx
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.base.admission import LoadShedder, MemoryRateLimitStore, rate_limiter
+from app.config import get_db_url
+from app.database import dispose_engines
+from app.main import app
+from bench.login_storm import percentile
+
+
+def check(label: str, ok: bool, detail: str = '') -> bool:
+    print(f"{'ok' if ok else 'FAIL':<5} {label:<52} {detail}")
+    return ok
+
+
+async def token_bucket() -> list[bool]:
+    store = MemoryRateLimitStore()
+    waits = [await store.take('bucket', 10, 5) for _ in range(6)]
+    await asyncio.sleep(0.11)
+    refilled = await store.take('bucket', 10, 5)
+    return [
+        check('burst of 5 admitted', waits[:5] == [0.0] * 5),
+        check('6th request waits for a token', 0.05 < waits[5] <= 0.1, f'retry after {waits[5] * 1000:.0f} ms'),
+        check('bucket refills at the configured rate', refilled == 0.0),
+    ]
+
+
+async def login_limit() -> list[bool]:
+    rate_limiter.enabled = True
+    rate_limiter.store = MemoryRateLimitStore()
+    rate_limiter.limits['auth'] = {'route_rate': 0, 'route_burst': 0, 'user_rate': 1.0, 'user_burst': 3}
+    transport = httpx.ASGITransport(app=app, client=('203.0.113.7', 4000))
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        responses = [await client.post('/auth/login/', json={'email': 'nobody@example.com', 'password': 'wrong-password'}) for _ in range(5)]
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app, client=('203.0.113.8', 4000)), base_url='http://bench') as client:
+        other = await client.post('/auth/login/', json={'email': 'nobody@example.com', 'password': 'wrong-password'})
+    codes = [response.status_code for response in responses]
+    return [
+        check('login burst from one client, then 429', codes == [401, 401, 401, 429, 429], ' '.join(map(str, codes))),
+        check('429 carries Retry-After', responses[-1].headers.get('retry-after') == '1'),
+        check('another client keeps its own bucket', other.status_code == 401),
+    ]
+
+
+async def overload(shedding: bool, args) -> dict:
+    engine = create_async_engine(get_db_url(), pool_size=args.pool, max_overflow=0)
+    pool = engine.sync_engine.pool
+    shedder = LoadShedder(args.pool if shedding else None, args.queue, args.max_wait, pool)
+    latencies, statuses = [], {}
+
+    async def request():
+        start = time.perf_counter()
+        try:
+            async with shedder.admit('bench'):
+                async with engine.connect() as conn:
+                    await conn.execute(text('SELECT pg_sleep(:s)'), {'s': args.work_ms / 1000})
+            code = 200
+        except HTTPException as e:
+            code = e.status_code
+        statuses[code] = statuses.get(code, 0) + 1
+        if code == 200:
+            latencies.append(time.perf_counter() - start)
+
+    async with engine.connect():
+        pass
+    await asyncio.gather(*[request() for _ in range(args.requests)])
+    await engine.dispose()
+    return {'statuses': statuses, 'p50': percentile(latencies, 50), 'p99': percentile(latencies, 99)}
+
+
+async def shedding(args) -> list[bool]:
+    print(f"{args.requests} concurrent requests, {args.work_ms:g} ms each, pool of {args.pool}, queue {args.queue}, max wait {args.max_wait:g} s")
+    results = []
+    for label, enabled in (('unbounded queue', False), ('load shedding', True)):
+        stats = await overload(enabled, args)
+        print(f"      {label:<18} served {stats['statuses'].get(200, 0):4}  shed {stats['statuses'].get(503, 0):4}  "
+              f"p50 {stats['p50'] * 1000:7.1f} ms  p99 {stats['p99'] * 1000:7.1f} ms")
+        results.append(stats)
+    bound = args.max_wait + 2 * args.work_ms / 1000
+    return [
+        check('without shedding every request waits its turn', results[0]['statuses'] == {200: args.requests}),
+        check('with shedding excess requests get 503', results[1]['statuses'].get(503, 0) > 0),
+        check('served p99 stays within max wait + work', results[1]['p99'] <= bound, f'bound {bound * 1000:.0f} ms'),
+    ]
+
+
+async def main(args):
+    results = await token_bucket()
+    results += await login_limit()
+    results += await shedding(args)
+    await dispose_engines()
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Demonstrate token-bucket rate limiting and pool-aware load shedding')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--pool', type=int, default=5)
+    parser.add_argument('--work-ms', type=float, default=20.0)
+    parser.add_argument('--queue', type=int, default=50)
+    parser.add_argument('--max-wait', type=float, default=0.25)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,75 @@
+import asyncio
+import sys
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+from app.database import RoutingSession, dispose_engines
+from app.main import app
+from app.products.dao import ProductDAO
+
+events = []
+failing = {'enabled': False}
+
+
+def on_commit(session):
+    if failing['enabled']:
+        raise RuntimeError('simulated commit failure')
+    events.append('db commit')
+
+
+class RecordResponse:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        async def record(message):
+            if message['type'] == 'http.response.body' and not message.get('more_body'):
+                events.append('response body sent')
+            await send(message)
+        await self.app(scope, receive, record)
+
+
+def check(label: str, ok: bool, detail: str = '') -> bool:
+    print(f"{'ok' if ok else 'FAIL':<5} {label:<52} {detail}")
+    return ok
+
+
+async def main():
+    event.listen(RoutingSession, 'before_commit', on_commit)
+    transport = httpx.ASGITransport(app=RecordResponse(app), raise_app_exceptions=False)
+    email = f'bench-{uuid.uuid4().hex[:8]}@example.com'
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        await client.post('/auth/register/', json={
+            'email': email, 'password': 'bench-password', 'first_name': 'Bench',
+            'is_consumer': False, 'is_supplier_owner': True,
+        })
+        await client.post('/auth/login/', json={'email': email, 'password': 'bench-password'})
+        supplier_id = (await client.get('/auth/me/')).json()['id']
+
+        events.clear()
+        added = await client.post('/products/add', json={'name': 'committed', 'description': 'bench', 'price': 1})
+        order = [name for name in events if name in ('db commit', 'response body sent')]
+        stored = await ProductDAO.get_all(supplier_id=supplier_id, name='committed')
+
+        failing['enabled'] = True
+        failed = await client.post('/products/add', json={'name': 'rolled-back', 'description': 'bench', 'price': 1})
+        failing['enabled'] = False
+        lost = await ProductDAO.get_all(supplier_id=supplier_id, name='rolled-back')
+
+        await ProductDAO.delete(supplier_id=supplier_id)
+    await dispose_engines()
+    results = [
+        check('write succeeds', added.status_code == 200, str(added.status_code)),
+        check('commit happens before the response is sent', order[-2:] == ['db commit', 'response body sent'], ' -> '.join(order)),
+        check('committed row is readable right after the response', len(stored) == 1),
+        check('failed commit returns a 5xx', failed.status_code >= 500, str(failed.status_code)),
+        check('failed commit stores nothing', not lost),
+    ]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.chat.dao import ChatDAO, MessageDAO
+from app.database import current_session, engine
+from app.products.models import Product
+from bench.login_storm import percentile
+
+
+async def seed(conn, args) -> int:
+    result = await conn.execute(text("""
+        INSERT INTO users (first_name, email, password, is_consumer, is_supplier_owner)
+        SELECT 'inbox', 'inbox-' || g || '-' || md5(random()::text) || '@example.com', 'x', g > 1, g = 1
+        FROM generate_series(1, :users) g
+        RETURNING id
+    """), {'users': args.consumers + 1})
+    user_ids = sorted(row.id for row in result)
+    supplier_id = user_ids[0]
+    await conn.execute(text("""
+        INSERT INTO chats (supplier_id, consumer_id)
+        SELECT :supplier_id, consumer_id FROM unnest(CAST(:consumer_ids AS integer[])) consumer_id
+    """), {'supplier_id': supplier_id, 'consumer_ids': user_ids[1:]})
+    await conn.execute(text("""
+        INSERT INTO messages (chat_id, sender_id, content)
+        SELECT chats.id, CASE WHEN g % 2 = 0 THEN chats.supplier_id ELSE chats.consumer_id END, 'message ' || g
+        FROM chats, generate_series(1, :messages) g
+        WHERE chats.supplier_id = :supplier_id
+    """), {'supplier_id': supplier_id, 'messages': args.messages})
+    await conn.execute(text('ANALYZE chats, messages'))
+    return supplier_id
+
+
+async def timed(func, repeat: int) -> list[float]:
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def n_plus_one(supplier_id: int):
+    for chat in await ChatDAO.get_all(supplier_id=supplier_id):
+        await MessageDAO.get_all(chat_id=chat.id)
+
+
+def report(label: str, latencies: list[float]):
+    print(f"{label:<34} p50 {statistics.median(latencies) * 1000:9.2f} ms  p99 {percentile(latencies, 99) * 1000:9.2f} ms")
+
+
+async def main(args):
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        supplier_id = await seed(conn, args)
+        token = current_session.set(AsyncSession(bind=conn))
+        try:
+            print(f"supplier with {args.consumers} chats, {args.messages} messages each")
+            report('chats + full history per chat', await timed(lambda: n_plus_one(supplier_id), args.n_plus_one_repeat))
+            report('inbox, all chats', await timed(lambda: ChatDAO.get_inbox('supplier', supplier_id), args.repeat))
+            report(f'inbox, first {args.page} chats', await timed(lambda: ChatDAO.get_inbox('supplier', supplier_id, args.page), args.repeat))
+        finally:
+            current_session.reset(token)
+            await transaction.rollback()
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Inbox latency for a supplier with thousands of consumers')
+    parser.add_argument('--consumers', type=int, default=5000)
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--page', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--n-plus-one-repeat', type=int, default=1)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,211 @@
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter, defaultdict
+from contextlib import AsyncExitStack
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+import httpx
+
+from bench.login_storm import percentile
+from bench.seed import WORDS
+
+query_counter: ContextVar[list | None] = ContextVar('query_counter', default=None)
+
+WEIGHTS = {'login': 1, 'browse': 4, 'search': 2, 'chat_read': 3, 'chat_send': 2, 'approve': 1}
+
+
+def count_query(*args):
+    counter = query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+class Recorder:
+    def __init__(self, count_queries: bool):
+        self.count_queries = count_queries
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.queries = defaultdict(list)
+
+    async def call(self, name: str, request) -> httpx.Response | None:
+        counter = [0]
+        token = query_counter.set(counter)
+        start = time.perf_counter()
+        response = None
+        try:
+            response = await request
+        except httpx.HTTPError:
+            pass
+        finally:
+            query_counter.reset(token)
+        self.latencies[name].append(time.perf_counter() - start)
+        if response is None or response.status_code >= 400:
+            self.errors[name] += 1
+        if self.count_queries:
+            self.queries[name].append(counter[0])
+        return response
+
+    @staticmethod
+    def stats(latencies: list[float], errors: int, queries: list[int], elapsed: float) -> dict:
+        return {
+            'requests': len(latencies),
+            'errors': errors,
+            'throughput': len(latencies) / elapsed,
+            'mean_ms': statistics.fmean(latencies) * 1000 if latencies else 0.0,
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p95_ms': percentile(latencies, 95) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'max_ms': max(latencies, default=0.0) * 1000,
+            'queries_per_request': statistics.fmean(queries) if queries else None,
+        }
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {
+            name: self.stats(latencies, self.errors[name], self.queries[name], elapsed)
+            for name, latencies in sorted(self.latencies.items())
+        }
+        totals = self.stats(
+            [latency for latencies in self.latencies.values() for latency in latencies],
+            sum(self.errors.values()),
+            [count for counts in self.queries.values() for count in counts],
+            elapsed,
+        )
+        return {'totals': totals, 'endpoints': endpoints}
+
+
+class LoadTest:
+    def __init__(self, args, manifest: dict, make_client, recorder: Recorder):
+        self.args = args
+        self.manifest = manifest
+        self.make_client = make_client
+        self.recorder = recorder
+        self.rng = random.Random(args.seed)
+        self.pending = [(supplier, consumer_id) for supplier in manifest['suppliers'] for consumer_id in supplier['pending']]
+        self.rng.shuffle(self.pending)
+        self.suppliers: dict[int, httpx.AsyncClient] = {}
+        self.supplier_lock = asyncio.Lock()
+
+    async def login(self, client: httpx.AsyncClient, email: str) -> httpx.Response | None:
+        return await self.recorder.call('login', client.post('/auth/login/', json={'email': email, 'password': self.manifest['password']}))
+
+    async def supplier_client(self, supplier: dict) -> httpx.AsyncClient:
+        async with self.supplier_lock:
+            if supplier['id'] not in self.suppliers:
+                client = self.make_client()
+                await self.login(client, supplier['email'])
+                self.suppliers[supplier['id']] = client
+            return self.suppliers[supplier['id']]
+
+    async def action(self, name: str, client: httpx.AsyncClient, consumer: dict):
+        if name == 'login':
+            await self.login(client, consumer['email'])
+        elif name == 'browse':
+            supplier_id = self.rng.choice(consumer['suppliers'])
+            await self.recorder.call(name, client.get(f'/products/supplier/{supplier_id}/', params={'limit': self.args.page_size}))
+        elif name == 'search':
+            await self.recorder.call(name, client.get('/products/search/', params={'q': self.rng.choice(WORDS)[:3]}))
+        elif name == 'chat_read':
+            chat_id = self.rng.choice(consumer['chats'])
+            await self.recorder.call(name, client.get(f'/chat/{chat_id}/', params={'limit': self.args.page_size, 'descending': True}))
+        elif name == 'chat_send':
+            chat_id = self.rng.choice(consumer['chats'])
+            await self.recorder.call(name, client.post(f'/chat/{chat_id}/', params={'content': f'load {time.time()}'}))
+        elif name == 'approve' and self.pending:
+            supplier, consumer_id = self.pending.pop()
+            supplier_client = await self.supplier_client(supplier)
+            await self.recorder.call(name, supplier_client.put('/links/approve-request/', params={'consumer_id': consumer_id}))
+
+    async def virtual_user(self, consumer: dict, deadline: float):
+        client = self.make_client()
+        try:
+            await self.login(client, consumer['email'])
+            names, weights = zip(*WEIGHTS.items())
+            while time.perf_counter() < deadline:
+                await self.action(self.rng.choices(names, weights)[0], client, consumer)
+        finally:
+            await client.aclose()
+
+    async def run(self) -> float:
+        consumers = [consumer for consumer in self.manifest['consumers'] if consumer['chats']]
+        users = [consumers[index % len(consumers)] for index in range(self.args.users)]
+        start = time.perf_counter()
+        await asyncio.gather(*[self.virtual_user(consumer, start + self.args.duration) for consumer in users])
+        elapsed = time.perf_counter() - start
+        for client in self.suppliers.values():
+            await client.aclose()
+        return elapsed
+
+
+def print_report(report: dict, baseline: dict | None):
+    print(f"{'endpoint':<12} {'requests':>8} {'errors':>6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+    for name, stats in [*report['endpoints'].items(), ('total', report['totals'])]:
+        queries = stats['queries_per_request']
+        line = (f"{name:<12} {stats['requests']:>8} {stats['errors']:>6} {stats['throughput']:>8.1f} "
+                f"{stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f} {stats['p99_ms']:>8.1f} "
+                f"{'-' if queries is None else f'{queries:.1f}':>8}")
+        previous = (baseline or {}).get('totals') if name == 'total' else (baseline or {}).get('endpoints', {}).get(name)
+        if previous and previous.get('p95_ms'):
+            line += f"  p95 {(stats['p95_ms'] / previous['p95_ms'] - 1) * 100:+.0f}% vs baseline"
+        print(line)
+
+
+async def main(args):
+    with open(args.manifest) as f:
+        manifest = json.load(f)
+    recorder = Recorder(count_queries=args.base_url is None)
+    async with AsyncExitStack() as stack:
+        if args.base_url is None:
+            from sqlalchemy import event
+
+            from app.base.admission import rate_limiter
+            from app.database import engine
+            from app.main import app as fastapi_app
+
+            rate_limiter.enabled = args.rate_limit
+            event.listen(engine.sync_engine, 'before_cursor_execute', count_query)
+            await stack.enter_async_context(fastapi_app.router.lifespan_context(fastapi_app))
+            transport = httpx.ASGITransport(app=fastapi_app)
+            target = f'in-process ({engine.url.render_as_string(hide_password=True)})'
+            make_client = lambda: httpx.AsyncClient(transport=transport, base_url='http://loadtest', timeout=60)
+        else:
+            target = args.base_url
+            make_client = lambda: httpx.AsyncClient(base_url=args.base_url, timeout=60)
+        elapsed = await LoadTest(args, manifest, make_client, recorder).run()
+
+    report = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'target': target,
+        'seed_run': manifest['run'],
+        'config': {'users': args.users, 'duration': args.duration, 'page_size': args.page_size, 'weights': WEIGHTS},
+        'elapsed': elapsed,
+        **recorder.summary(elapsed),
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print(f'{target}: {args.users} users for {elapsed:.1f}s')
+    print_report(report, baseline)
+    print(f'report written to {args.output}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Drive login, catalog, chat and link traffic against a seeded database')
+    parser.add_argument('--manifest', default='bench/manifest.json')
+    parser.add_argument('--base-url', default=None, help='HTTP server to load; default runs the app in-process and counts queries')
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--page-size', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench/load-report.json')
+    parser.add_argument('--baseline', default=None, help='previous report to compare p95 against')
+    parser.add_argument('--rate-limit', action='store_true',
+                        help='keep per-client rate limits on in-process; with --base-url start the server with RATE_LIMIT_ENABLED=false instead')
+    asyncio.run(main(parser.parse_args()))
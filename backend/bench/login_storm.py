@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+import httpx
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def register(client: httpx.AsyncClient, email: str, password: str):
+    await client.post('/auth/register/', json={'email': email, 'password': password, 'first_name': 'Bench'})
+
+
+async def login_worker(client: httpx.AsyncClient, email: str, password: str, deadline: float, stats: dict):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.post('/auth/login/', json={'email': email, 'password': password})
+        stats['login_latency'].append(time.perf_counter() - start)
+        stats['login_status'][response.status_code] = stats['login_status'].get(response.status_code, 0) + 1
+
+
+async def probe_worker(client: httpx.AsyncClient, path: str, deadline: float, stats: dict):
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        await client.get(path)
+        stats['probe_latency'].append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def main(args):
+    email = f'bench-{uuid.uuid4().hex[:8]}@example.com'
+    password = 'bench-password'
+    stats = {'login_latency': [], 'login_status': {}, 'probe_latency': []}
+    limits = httpx.Limits(max_connections=args.concurrency + args.probes)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        await register(client, email, password)
+        deadline = time.perf_counter() + args.duration
+        tasks = [login_worker(client, email, password, deadline, stats) for _ in range(args.concurrency)]
+        tasks += [probe_worker(client, args.probe_path, deadline, stats) for _ in range(args.probes)]
+        await asyncio.gather(*tasks)
+
+    logins_ok = stats['login_status'].get(200, 0)
+    print(f"logins/s: {logins_ok / args.duration:.1f}  statuses: {stats['login_status']}")
+    if stats['login_latency']:
+        print(f"login p50: {statistics.median(stats['login_latency']) * 1000:.1f} ms  "
+              f"p99: {percentile(stats['login_latency'], 99) * 1000:.1f} ms")
+    if stats['probe_latency']:
+        print(f"{args.probe_path} p50: {statistics.median(stats['probe_latency']) * 1000:.1f} ms  "
+              f"p99: {percentile(stats['probe_latency'], 99) * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Login storm: login throughput and p99 of an unrelated endpoint')
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--probes', type=int, default=4)
+    parser.add_argument('--probe-path', default='/')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+
+from sqlalchemy import delete, event
+
+from app.chat.dao import ChatDAO, MessageDAO
+from app.chat.models import Chat, Message
+from app.chat.writer import MessageWriter
+from app.database import engine, session_scope
+from app.products.models import Product
+from app.users.dao import UserDAO
+from app.users.models import User
+from bench.login_storm import percentile
+
+commits = [0]
+
+
+def count_commit(*args):
+    commits[0] += 1
+
+
+async def seed(chats: int) -> tuple[list[int], list[tuple[int, int, int]]]:
+    run = uuid.uuid4().hex[:8]
+    users = [{'first_name': 'Writer', 'email': f'writer-{run}-{index}@example.com', 'password': 'x'} for index in range(chats + 1)]
+    user_ids = await UserDAO.add_many(users)
+    supplier_id, consumer_ids = user_ids[0], user_ids[1:]
+    chat_ids = await ChatDAO.add_many([{'supplier_id': supplier_id, 'consumer_id': consumer_id} for consumer_id in consumer_ids])
+    return user_ids, [(chat_id, supplier_id, consumer_id) for chat_id, consumer_id in zip(chat_ids, consumer_ids)]
+
+
+async def cleanup(user_ids: list[int], chat_ids: list[int]):
+    async with session_scope() as session:
+        await session.execute(delete(Message).where(Message.chat_id.in_(chat_ids)))
+        await session.execute(delete(Chat).where(Chat.id.in_(chat_ids)))
+        await session.execute(delete(User).where(User.id.in_(user_ids)))
+
+
+async def run(send, chats: list[tuple[int, int, int]], senders: int, messages: int) -> dict:
+    latencies = []
+
+    async def sender(index: int):
+        chat_id, supplier_id, consumer_id = chats[index % len(chats)]
+        for number in range(messages):
+            start = time.perf_counter()
+            await send(chat_id=chat_id, sender_id=supplier_id if number % 2 else consumer_id, content=f'writer bench {number}')
+            latencies.append(time.perf_counter() - start)
+
+    commits[0] = 0
+    start = time.perf_counter()
+    await asyncio.gather(*[sender(index) for index in range(senders)])
+    elapsed = time.perf_counter() - start
+    return {
+        'throughput': len(latencies) / elapsed,
+        'p50': statistics.median(latencies),
+        'p99': percentile(latencies, 99),
+        'commits': commits[0],
+        'messages': len(latencies),
+    }
+
+
+def report(label: str, stats: dict):
+    print(f"{label:<28} {stats['throughput']:9.0f} msg/s  p50 {stats['p50'] * 1000:7.2f} ms  p99 {stats['p99'] * 1000:7.2f} ms  "
+          f"{stats['messages'] / max(stats['commits'], 1):6.1f} msg/commit")
+
+
+async def main(args):
+    event.listen(engine.sync_engine, 'commit', count_commit)
+    user_ids, chats = await seed(args.chats)
+    try:
+        print(f"{args.senders} concurrent senders x {args.messages} messages over {args.chats} chats")
+        report('commit per message', await run(MessageDAO.add, chats, args.senders, args.messages))
+        writer = MessageWriter(True, args.window_ms / 1000, args.batch_size)
+        await writer.start()
+        try:
+            report(f'group commit ({args.window_ms:g} ms window)', await run(writer.submit, chats, args.senders, args.messages))
+        finally:
+            await writer.stop()
+    finally:
+        await cleanup(user_ids, [chat_id for chat_id, _, _ in chats])
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Chat message write throughput: commit per message vs the group-commit writer')
+    parser.add_argument('--senders', type=int, default=200)
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--chats', type=int, default=50)
+    parser.add_argument('--window-ms', type=float, default=2.0)
+    parser.add_argument('--batch-size', type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,106 @@
+import argparse
+import asyncio
+import json
+import sys
+
+from sqlalchemy import func, literal_column, select, text
+
+from app.chat.models import Chat, Message
+from app.database import engine
+from app.links.models import Link
+from app.products.models import Product, product_search_vector
+from app.users.models import User
+
+
+SEED_STATEMENTS = [
+    """
+    INSERT INTO products (name, description, price, supplier_id)
+    SELECT 'product-' || g, 'seeded', g % 1000, :first_user + g % :suppliers
+    FROM generate_series(1, :products) g
+    """,
+    """
+    INSERT INTO links (supplier_id, consumer_id, is_approved)
+    SELECT :first_user + g % :suppliers, :first_user + :suppliers + (g / :suppliers) % :consumers, g % 3 <> 0
+    FROM generate_series(1, :links) g
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO chats (supplier_id, consumer_id)
+    SELECT :first_user + g % :suppliers, :first_user + :suppliers + g % :consumers
+    FROM generate_series(1, :chats) g
+    """,
+]
+
+
+def hot_queries(supplier_id: int, consumer_id: int, chat_id: int) -> list:
+    return [
+        ('messages', 'messages of a chat', select(Message).filter_by(chat_id=chat_id).order_by(Message.id).limit(101)),
+        ('chats', 'chats of a supplier', select(Chat).filter_by(supplier_id=supplier_id)),
+        ('chats', 'chats of a consumer', select(Chat).filter_by(consumer_id=consumer_id)),
+        ('links', 'approved links of a consumer', select(Link).filter_by(consumer_id=consumer_id, is_approved=True)),
+        ('links', 'pending links of a supplier', select(Link).filter_by(supplier_id=supplier_id, is_approved=False)),
+        ('links', 'link lookup', select(Link).filter_by(supplier_id=supplier_id, consumer_id=consumer_id)),
+        ('products', 'catalog of a supplier', select(Product).filter_by(supplier_id=supplier_id).order_by(Product.id).limit(101)),
+        ('products', 'product search', select(Product).where(
+            product_search_vector.bool_op('@@')(func.to_tsquery(literal_column("'simple'::regconfig"), 'product-12:*'))
+        ).limit(20)),
+    ]
+
+
+def seq_scans(plan: dict, table: str) -> bool:
+    if plan.get('Node Type') == 'Seq Scan' and plan.get('Relation Name') == table:
+        return True
+    return any(seq_scans(child, table) for child in plan.get('Plans', []))
+
+
+async def main(args) -> int:
+    failures = 0
+    async with engine.connect() as conn:
+        transaction = await conn.begin()
+        result = await conn.execute(text("""
+            INSERT INTO users (first_name, email, password, is_consumer, is_supplier_owner)
+            SELECT 'plan', 'plan-' || g || '-' || md5(random()::text) || '@example.com', 'x', g > :suppliers, g <= :suppliers
+            FROM generate_series(1, :users) g
+            RETURNING id
+        """), {'suppliers': args.suppliers, 'users': args.suppliers + args.consumers})
+        first_user = min(row.id for row in result)
+        params = {
+            'first_user': first_user, 'suppliers': args.suppliers, 'consumers': args.consumers,
+            'products': args.products, 'links': args.links, 'chats': args.chats,
+        }
+        for statement in SEED_STATEMENTS:
+            await conn.execute(text(statement), params)
+        chat_ids = (await conn.execute(text('SELECT min(id), max(id) FROM chats'))).one()
+        await conn.execute(text("""
+            INSERT INTO messages (chat_id, sender_id, content)
+            SELECT :first_chat + g % :chat_count, :first_user, 'seeded'
+            FROM generate_series(1, :messages) g
+        """), {'first_chat': chat_ids[0], 'chat_count': chat_ids[1] - chat_ids[0] + 1, 'first_user': first_user, 'messages': args.messages})
+        await conn.execute(text('ANALYZE users, products, links, chats, messages'))
+
+        supplier_id = first_user + args.suppliers // 2
+        consumer_id = first_user + args.suppliers + args.consumers // 2
+        for table, label, query in hot_queries(supplier_id, consumer_id, chat_ids[1]):
+            compiled = query.compile(engine.sync_engine, compile_kwargs={'literal_binds': True})
+            plan = (await conn.execute(text(f'EXPLAIN (FORMAT JSON) {compiled}'))).scalar()
+            plan = json.loads(plan) if isinstance(plan, str) else plan
+            if seq_scans(plan[0]['Plan'], table):
+                failures += 1
+                print(f'FAIL  {label}: sequential scan on {table}')
+                print(json.dumps(plan[0]['Plan'], indent=2))
+            else:
+                print(f'ok    {label}')
+        await transaction.rollback()
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fail when a hot query falls back to a sequential scan')
+    parser.add_argument('--suppliers', type=int, default=200)
+    parser.add_argument('--consumers', type=int, default=2000)
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--links', type=int, default=20000)
+    parser.add_argument('--chats', type=int, default=10000)
+    parser.add_argument('--messages', type=int, default=200000)
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,50 @@
+import asyncio
+import sys
+import uuid
+
+import httpx
+
+from app.chat.dao import ChatDAO, MessageDAO
+from app.database import dispose_engines
+from app.main import app
+
+
+def check(label: str, ok: bool, detail: str = '') -> bool:
+    print(f"{'ok' if ok else 'FAIL':<5} {label:<52} {detail}")
+    return ok
+
+
+async def register(client: httpx.AsyncClient, **flags) -> int:
+    email = f'bench-{uuid.uuid4().hex[:8]}@example.com'
+    await client.post('/auth/register/', json={'email': email, 'password': 'bench-password', 'first_name': 'Bench', **flags})
+    await client.post('/auth/login/', json={'email': email, 'password': 'bench-password'})
+    return (await client.get('/auth/me/')).json()['id']
+
+
+async def main():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as supplier, \
+            httpx.AsyncClient(transport=transport, base_url='http://bench') as consumer:
+        supplier_id = await register(supplier, is_consumer=False, is_supplier_owner=True)
+        consumer_id = await register(consumer)
+        chat_id = (await ChatDAO.add(supplier_id=supplier_id, consumer_id=consumer_id)).id
+        last_id = (await MessageDAO.add(chat_id=chat_id, sender_id=supplier_id, content='before')).id
+
+        marked = (await consumer.put(f'/chat/{chat_id}/read/', params={'message_id': 1_000_000})).json()
+        for number in range(3):
+            await supplier.post(f'/chat/{chat_id}/', params={'content': f'after {number}'})
+        inbox = (await consumer.get('/chat/inbox/')).json()
+
+        await MessageDAO.delete(chat_id=chat_id)
+        await ChatDAO.delete(id=chat_id)
+    await dispose_engines()
+    results = [
+        check('oversized read mark is capped at the last message', marked.get('last_read_id') == last_id, str(marked)),
+        check('later messages count as unread', [chat['unread_count'] for chat in inbox] == [3], str([chat['unread_count'] for chat in inbox])),
+    ]
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
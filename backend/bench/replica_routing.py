@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import sys
+import uuid
+from collections import Counter
+
+from sqlalchemy import event
+
+from app.database import Base, async_session_maker, current_session, dispose_engines, engine, primary_reads, replica_engine
+from app.products.models import Product
+from app.users.dao import UserDAO
+
+statements = Counter()
+
+
+def count_on(name: str):
+    def count(*args):
+        statements[name] += 1
+    return count
+
+
+async def routed(label: str, expected: str, call) -> bool:
+    before = statements.copy()
+    result = await call()
+    used = sorted(name for name in statements if statements[name] > before[name])
+    ok = used == [expected]
+    print(f"{'ok' if ok else 'FAIL':<5} {label:<46} {'+'.join(used) or '-':<8} found={bool(result)}")
+    return ok
+
+
+async def main(args):
+    if replica_engine is engine:
+        sys.exit('DATABASE_REPLICA_URL is not set; point it at a second database')
+    if args.create_schema:
+        for schema_engine in (engine, replica_engine):
+            async with schema_engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+    event.listen(engine.sync_engine, 'before_cursor_execute', count_on('primary'))
+    event.listen(replica_engine.sync_engine, 'before_cursor_execute', count_on('replica'))
+
+    email = f'replica-{uuid.uuid4().hex[:8]}@example.com'
+    user = await UserDAO.add(first_name='Replica', email=email, password='x')
+    results = [
+        await routed('read outside a request', 'replica', lambda: UserDAO.get_one_or_none(email=email)),
+    ]
+    with primary_reads():
+        results.append(await routed('read inside primary_reads()', 'primary', lambda: UserDAO.get_one_or_none(email=email)))
+
+    async with async_session_maker() as session:
+        token = current_session.set(session)
+        try:
+            results.append(await routed('request read before any write', 'replica', lambda: UserDAO.get_all(email=email)))
+            results.append(await routed('request write', 'primary', lambda: UserDAO.update({'id': user.id}, last_name='Routed')))
+            results.append(await routed('request read after the write', 'primary', lambda: UserDAO.get_one_or_none(email=email)))
+            await session.commit()
+        finally:
+            current_session.reset(token)
+    await UserDAO.delete(id=user.id)
+    await dispose_engines()
+    if not all(results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check DAO read routing between DATABASE_URL and DATABASE_REPLICA_URL')
+    parser.add_argument('--create-schema', action='store_true', help='create tables in both databases with metadata.create_all')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+
+from app.config import settings
+from app.database import engine
+from app.products.dao import ProductDAO
+from app.products.search import local_search_index
+from app.users.models import User
+from bench.login_storm import percentile
+
+WORDS = [
+    'steel', 'stainless', 'bolt', 'bracket', 'cable', 'copper', 'valve', 'pump', 'filter', 'gasket',
+    'hose', 'clamp', 'washer', 'screw', 'nut', 'bearing', 'gear', 'motor', 'sensor', 'switch',
+    'relay', 'fuse', 'panel', 'pipe', 'fitting', 'flange', 'seal', 'spring', 'chain', 'belt',
+]
+
+QUERIES = [
+    ('prefix, one term', {'q': 'ste'}),
+    ('prefix, two terms', {'q': 'stain val'}),
+    ('full word, price range', {'q': 'bearing', 'min_price': 100, 'max_price': 400}),
+    ('price range, cheapest first', {'min_price': 500, 'max_price': 600, 'sort': 'price_asc'}),
+    ('browse, newest first', {'sort': 'newest'}),
+    ('one supplier, by name', {'q': 'pump', 'sort': 'name', 'supplier': True}),
+]
+
+
+async def seed(args) -> list[int]:
+    async with engine.begin() as conn:
+        result = await conn.execute(text("""
+            INSERT INTO users (first_name, email, password, is_consumer, is_supplier_owner)
+            SELECT 'search', 'search-' || g || '-' || md5(random()::text) || '@example.com', 'x', false, true
+            FROM generate_series(1, :suppliers) g
+            RETURNING id
+        """), {'suppliers': args.suppliers})
+        supplier_ids = sorted(row.id for row in result)
+        await conn.execute(text("""
+            INSERT INTO products (name, description, price, supplier_id)
+            SELECT words[1 + g % 30] || ' ' || words[1 + (g / 30) % 30] || ' ' || g,
+                   'seeded ' || words[1 + (g / 900) % 30] || ' for industrial use',
+                   g % 1000, :first_supplier + g % :suppliers
+            FROM generate_series(1, :products) g, (SELECT CAST(:words AS text[]) AS words) w
+        """), {'first_supplier': supplier_ids[0], 'suppliers': args.suppliers, 'products': args.products, 'words': WORDS})
+        await conn.execute(text('ANALYZE products'))
+    return supplier_ids
+
+
+async def cleanup(supplier_ids: list[int]):
+    async with engine.begin() as conn:
+        await conn.execute(text('DELETE FROM products WHERE supplier_id = ANY(:ids)'), {'ids': supplier_ids})
+        await conn.execute(text('DELETE FROM users WHERE id = ANY(:ids)'), {'ids': supplier_ids})
+
+
+async def measure(label: str, supplier_ids: set[int], params: dict, repeat: int):
+    params = dict(params)
+    if params.pop('supplier', False):
+        params['supplier_id'] = min(supplier_ids)
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items, facets = await ProductDAO.search(supplier_ids, **params)
+        latencies.append(time.perf_counter() - start)
+    print(f"  {label:<30} hits {sum(facets.values()):>7}  p50 {statistics.median(latencies) * 1000:7.2f} ms  "
+          f"p95 {percentile(latencies, 95) * 1000:7.2f} ms  p99 {percentile(latencies, 99) * 1000:7.2f} ms")
+
+
+async def main(args):
+    supplier_ids = await seed(args)
+    try:
+        scope = set(supplier_ids[:args.linked])
+        for backend in args.backends:
+            settings.PRODUCT_SEARCH_BACKEND = backend
+            local_search_index.invalidate()
+            start = time.perf_counter()
+            await ProductDAO.search(scope, q='warmup')
+            print(f"{backend}: {args.products} products, {len(scope)} linked suppliers, first query {time.perf_counter() - start:.2f}s")
+            for label, params in QUERIES:
+                await measure(label, scope, params, args.repeat)
+    finally:
+        await cleanup(supplier_ids)
+        await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Product search latency over a seeded catalog')
+    parser.add_argument('--suppliers', type=int, default=200)
+    parser.add_argument('--products', type=int, default=100000)
+    parser.add_argument('--linked', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--backends', nargs='+', default=['postgres', 'local'])
+    asyncio.run(main(parser.parse_args()))
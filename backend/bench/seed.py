@@ -0,0 +1,150 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from itertools import islice
+
+from sqlalchemy import insert
+
+from app.chat.dao import ChatDAO, MessageDAO
+from app.dashboard.dao import SupplierDashboardDAO
+from app.database import Base, engine, session_scope
+from app.links.models import Link
+from app.products.dao import ProductDAO
+from app.users.auth import get_password_hash
+from app.users.dao import UserDAO
+
+WORDS = ['steel', 'bolt', 'valve', 'pump', 'filter', 'cable', 'copper', 'gear', 'motor', 'sensor', 'seal', 'pipe']
+
+
+def batches(rows: list, size: int):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+async def add_many(dao, rows: list[dict], batch_size: int) -> list[int]:
+    ids = []
+    for batch in batches(rows, batch_size):
+        ids += await dao.add_many(batch)
+    return ids
+
+
+async def insert_links(rows: list[dict], batch_size: int):
+    for batch in batches(rows, batch_size):
+        async with session_scope() as session:
+            await session.execute(insert(Link), batch)
+
+
+def user_rows(prefix: str, count: int, password: str, **columns) -> list[dict]:
+    return [{'first_name': 'Load', 'email': f'{prefix}-{index}@example.com', 'password': password, **columns} for index in range(count)]
+
+
+async def seed(args) -> dict:
+    rng = random.Random(args.seed)
+    run = args.run or uuid.uuid4().hex[:8]
+    password = get_password_hash(args.password)
+    timings = {}
+
+    start = time.perf_counter()
+    suppliers = await add_many(UserDAO, user_rows(f'load-{run}-supplier', args.suppliers, password, is_consumer=False, is_supplier_owner=True), args.batch_size)
+    team_rows = [
+        {**row, 'is_supplier_manager': index % 2 == 0, 'is_supplier_repr': index % 2 == 1}
+        for supplier_id in suppliers
+        for index, row in enumerate(user_rows(f'load-{run}-team-{supplier_id}', args.team, password, is_consumer=False, supplier_owner_id=supplier_id))
+    ]
+    team = await add_many(UserDAO, team_rows, args.batch_size)
+    consumers = await add_many(UserDAO, user_rows(f'load-{run}-consumer', args.consumers, password), args.batch_size)
+    timings['users'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    link_rows, approved, pending = [], [], {supplier_id: [] for supplier_id in suppliers}
+    for consumer_id in consumers:
+        for supplier_id in rng.sample(suppliers, min(args.links_per_consumer, len(suppliers))):
+            is_approved = rng.random() < args.approved_ratio
+            link_rows.append({'supplier_id': supplier_id, 'consumer_id': consumer_id, 'is_approved': is_approved})
+            if is_approved:
+                approved.append((supplier_id, consumer_id))
+            else:
+                pending[supplier_id].append(consumer_id)
+    await insert_links(link_rows, args.batch_size)
+    chat_ids = await add_many(ChatDAO, [{'supplier_id': supplier_id, 'consumer_id': consumer_id} for supplier_id, consumer_id in approved], args.batch_size)
+    timings['links'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    product_rows = [
+        {'name': f'{rng.choice(WORDS)} {rng.choice(WORDS)} {index}', 'description': f'load {rng.choice(WORDS)}', 'price': rng.randint(1, 1000), 'supplier_id': supplier_id}
+        for supplier_id in suppliers for index in range(args.products_per_supplier)
+    ]
+    await add_many(ProductDAO, product_rows, args.batch_size)
+    timings['products'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    message_rows = [
+        {'chat_id': chat_id, 'sender_id': supplier_id if index % 2 else consumer_id, 'content': f'load message {index}'}
+        for chat_id, (supplier_id, consumer_id) in zip(chat_ids, approved) for index in range(args.messages_per_chat)
+    ]
+    await add_many(MessageDAO, message_rows, args.batch_size)
+    timings['messages'] = time.perf_counter() - start
+
+    # links and chats above skip the DAO paths that keep the counters in step
+    start = time.perf_counter()
+    for batch in batches(suppliers, args.batch_size):
+        await SupplierDashboardDAO.rebuild(batch)
+    timings['dashboards'] = time.perf_counter() - start
+
+    consumer_suppliers, consumer_chats = {}, {}
+    for chat_id, (supplier_id, consumer_id) in zip(chat_ids, approved):
+        consumer_suppliers.setdefault(consumer_id, []).append(supplier_id)
+        consumer_chats.setdefault(consumer_id, []).append(chat_id)
+    return {
+        'run': run,
+        'password': args.password,
+        'counts': {
+            'suppliers': len(suppliers), 'team': len(team), 'consumers': len(consumers), 'links': len(link_rows),
+            'chats': len(chat_ids), 'products': len(product_rows), 'messages': len(message_rows),
+        },
+        'timings': timings,
+        'suppliers': [
+            {'id': supplier_id, 'email': f'load-{run}-supplier-{index}@example.com', 'pending': pending[supplier_id]}
+            for index, supplier_id in enumerate(suppliers)
+        ],
+        'consumers': [
+            {'id': consumer_id, 'email': f'load-{run}-consumer-{index}@example.com',
+             'suppliers': consumer_suppliers.get(consumer_id, []), 'chats': consumer_chats.get(consumer_id, [])}
+            for index, consumer_id in enumerate(consumers)
+        ],
+    }
+
+
+async def main(args):
+    if args.create_schema:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    manifest = await seed(args)
+    with open(args.output, 'w') as f:
+        json.dump(manifest, f)
+    await engine.dispose()
+    print(f"run {manifest['run']}: {manifest['counts']}")
+    print('seconds: ' + '  '.join(f'{name} {seconds:.2f}' for name, seconds in manifest['timings'].items()))
+    print(f'manifest written to {args.output}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Seed users, supplier teams, links, products and messages for load tests')
+    parser.add_argument('--suppliers', type=int, default=20)
+    parser.add_argument('--team', type=int, default=2)
+    parser.add_argument('--consumers', type=int, default=500)
+    parser.add_argument('--links-per-consumer', type=int, default=3)
+    parser.add_argument('--approved-ratio', type=float, default=0.8)
+    parser.add_argument('--products-per-supplier', type=int, default=500)
+    parser.add_argument('--messages-per-chat', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--password', default='load-password')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--run', default=None)
+    parser.add_argument('--create-schema', action='store_true', help='create tables with metadata.create_all (SQLite stand-in)')
+    parser.add_argument('--output', default='bench/manifest.json')
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,49 @@
+import argparse
+import json
+import time
+from datetime import datetime
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.chat.models import Chat, Message
+from app.chat.schemas import SMessage
+from app.products.models import Product
+from app.products.schemas import SProduct
+from app.users.models import User
+
+
+def make_rows(model, count: int, **columns) -> list:
+    now = datetime.now()
+    return [model(id=index, created_at=now, updated_at=now, **columns) for index in range(1, count + 1)]
+
+
+def reflection_path(rows: list) -> bytes:
+    return json.dumps(jsonable_encoder(rows)).encode()
+
+
+def measure(label: str, func, rows: list, repeat: int):
+    func(rows)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(rows)
+    per_call = (time.perf_counter() - start) / repeat
+    print(f"{label:<36} {per_call * 1000 / (len(rows) / 1000):8.2f} ms per 1k rows")
+
+
+def main(args):
+    datasets = {
+        'products': (make_rows(Product, args.rows, name='product', description='seeded', price=100, supplier_id=1), SProduct),
+        'messages': (make_rows(Message, args.rows, chat_id=1, sender_id=1, content='hello there'), SMessage),
+    }
+    for name, (rows, schema) in datasets.items():
+        adapter = TypeAdapter(list[schema])
+        measure(f'{name}: jsonable_encoder + json.dumps', reflection_path, rows, args.repeat)
+        measure(f'{name}: validate + dump_json', lambda rows: adapter.dump_json(adapter.validate_python(rows)), rows, args.repeat)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Response serialization cost per 1k rows, before and after response models')
+    parser.add_argument('--rows', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    main(parser.parse_args())
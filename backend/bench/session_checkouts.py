@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import uuid
+
+import httpx
+from sqlalchemy import event
+
+from app.database import engine, get_session
+from app.main import app
+
+counters = {'checkouts': 0, 'statements': 0}
+
+
+def on_checkout(*args):
+    counters['checkouts'] += 1
+
+
+def on_execute(*args):
+    counters['statements'] += 1
+
+
+async def per_call_session():
+    yield None
+
+
+async def measure(client: httpx.AsyncClient, label: str, requests: int, send):
+    counters.update(checkouts=0, statements=0)
+    for _ in range(requests):
+        await send()
+    print(f"{label:<28} checkouts/request: {counters['checkouts'] / requests:.2f}  "
+          f"statements/request: {counters['statements'] / requests:.2f}")
+
+
+async def main(args):
+    if args.per_call:
+        app.dependency_overrides[get_session] = per_call_session
+    event.listen(engine.sync_engine.pool, 'checkout', on_checkout)
+    event.listen(engine.sync_engine, 'before_cursor_execute', on_execute)
+
+    email = f'bench-{uuid.uuid4().hex[:8]}@example.com'
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench') as client:
+        await client.post('/auth/register/', json={
+            'email': email, 'password': 'bench-password', 'first_name': 'Bench',
+            'is_consumer': False, 'is_supplier_owner': True,
+        })
+        await client.post('/auth/login/', json={'email': email, 'password': 'bench-password'})
+        supplier_id = (await client.get('/auth/me/')).json()['id']
+        await client.post('/products/add', json={'name': 'bench', 'description': 'bench', 'price': 1})
+        product_id = (await client.get(f'/products/supplier/{supplier_id}/', params={'name': 'bench'})).json()[-1]['id']
+
+        await measure(client, 'PUT /products/update/{id}', args.requests,
+                      lambda: client.put(f'/products/update/{product_id}', json={'price': 2}))
+        await measure(client, 'GET /products/{id}', args.requests,
+                      lambda: client.get(f'/products/{product_id}'))
+        await client.delete(f'/products/delete/{product_id}')
+    await engine.dispose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Connection checkouts and SQL statements per request')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--per-call', action='store_true', help='disable the request-scoped session')
+    asyncio.run(main(parser.parse_args()))
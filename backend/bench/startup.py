@@ -0,0 +1,96 @@
+import argparse
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = 'import time; start = time.perf_counter(); import app.main; print(time.perf_counter() - start)'
+
+
+def import_times(runs: int) -> list[float]:
+    return [
+        float(subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], capture_output=True, text=True, check=True).stdout)
+        for _ in range(runs)
+    ]
+
+
+def slowest_imports(top: int) -> list[tuple[int, str]]:
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app.main'], capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.removeprefix('import time:').split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        if depth <= 1:
+            rows.append((int(cumulative), name.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def worker_pids(pid: int) -> list[int]:
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return [int(child) for child in f.read().split()]
+
+
+def wait_ready(client: httpx.Client, timeout: float) -> float:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if client.get('/').status_code == 200:
+                return time.perf_counter()
+        except httpx.TransportError:
+            time.sleep(0.005)
+    raise TimeoutError('server did not answer in time')
+
+
+def timed_request(client: httpx.Client, method: str, url: str, **kwargs) -> float:
+    start = time.perf_counter()
+    client.request(method, url, **kwargs)
+    return time.perf_counter() - start
+
+
+def cold_start(args, warmup: bool) -> dict:
+    env = {**os.environ, 'DB_POOL_WARMUP': str(warmup).lower()}
+    command = [sys.executable, 'serve.py', '--workers', '1', '--port', str(args.port)]
+    start = time.perf_counter()
+    server = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(base_url=f'http://127.0.0.1:{args.port}', timeout=30) as client:
+            ready = wait_ready(client, args.timeout) - start
+            login = {'email': 'startup-bench@example.com', 'password': 'startup-bench'}
+            first_db = timed_request(client, 'POST', '/auth/login/', json=login)
+            second_db = timed_request(client, 'POST', '/auth/login/', json=login)
+        time.sleep(args.settle)
+        os.kill(worker_pids(server.pid)[0], signal.SIGKILL)
+        with httpx.Client(base_url=f'http://127.0.0.1:{args.port}', timeout=30) as client:
+            respawn = timed_request(client, 'GET', '/')
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=args.timeout)
+    return {'ready': ready, 'first_db': first_db, 'second_db': second_db, 'respawn': respawn}
+
+
+def main(args):
+    times = import_times(args.runs)
+    print(f"import app.main          median {statistics.median(times) * 1000:8.1f} ms  min {min(times) * 1000:8.1f} ms  ({args.runs} runs)")
+    for cumulative, name in slowest_imports(args.top):
+        print(f"  {name:<40} {cumulative / 1000:8.1f} ms")
+    for warmup in (False, True):
+        runs = [cold_start(args, warmup) for _ in range(args.runs)]
+        label = 'with pool warm-up' if warmup else 'without pool warm-up'
+        print(f"cold worker, {label}:")
+        for key, title in [('ready', 'spawn to first response'), ('first_db', 'first database request'),
+                           ('second_db', 'second database request'), ('respawn', 'pre-forked respawn to response')]:
+            print(f"  {title:<32} median {statistics.median(run[key] for run in runs) * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Import time and time to first request of a cold server worker')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10, help='slowest top-level imports to list')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--settle', type=float, default=1.5, help='seconds to let the worker live before killing it, past the crash-loop backoff')
+    main(parser.parse_args())
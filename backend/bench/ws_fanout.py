@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+import uuid
+
+import httpx
+import websockets
+
+from bench.login_storm import percentile
+
+
+async def create_user(base_url: str, email: str, **extra) -> httpx.AsyncClient:
+    client = httpx.AsyncClient(base_url=base_url, timeout=60)
+    await client.post('/auth/register/', json={'email': email, 'password': 'bench-password', 'first_name': 'Bench', **extra})
+    await client.post('/auth/login/', json={'email': email, 'password': 'bench-password'})
+    return client
+
+
+async def receive(url: str, cookie: str, expected: int, latencies: list, connected: list, total: int, ready: asyncio.Event):
+    async with websockets.connect(url, additional_headers={'Cookie': f'users_access_token={cookie}'}) as socket:
+        connected.append(socket)
+        if len(connected) == total:
+            ready.set()
+        for _ in range(expected):
+            event = json.loads(await socket.recv())
+            latencies.append(time.perf_counter() - float(event['message']['content']))
+
+
+async def main(args):
+    run = uuid.uuid4().hex[:8]
+    supplier = await create_user(args.base_url, f'ws-supplier-{run}@example.com', is_consumer=False, is_supplier_owner=True)
+    supplier_id = (await supplier.get('/auth/me/')).json()['id']
+
+    semaphore = asyncio.Semaphore(16)
+
+    async def create_consumer(index: int) -> httpx.AsyncClient:
+        async with semaphore:
+            consumer = await create_user(args.base_url, f'ws-consumer-{run}-{index}@example.com')
+            await consumer.post('/links/send-request/', params={'supplier_id': supplier_id})
+            consumer_id = (await consumer.get('/auth/me/')).json()['id']
+            await supplier.put('/links/approve-request/', params={'consumer_id': consumer_id})
+            return consumer
+
+    consumers = await asyncio.gather(*[create_consumer(index) for index in range(args.connections)])
+    chat_ids = [chat['id'] for chat in (await supplier.get('/chat/')).json()]
+
+    per_chat = args.messages // len(chat_ids)
+    latencies: list[float] = []
+    ready = asyncio.Event()
+    connected: list = []
+    ws_url = args.base_url.replace('http', 'ws', 1) + '/chat/ws/'
+    receivers = [
+        asyncio.create_task(receive(ws_url, consumer.cookies['users_access_token'], per_chat, latencies, connected, len(consumers), ready))
+        for consumer in consumers
+    ]
+    await asyncio.wait_for(ready.wait(), timeout=60)
+
+    start = time.perf_counter()
+    for _ in range(per_chat):
+        await asyncio.gather(*[
+            supplier.post(f'/chat/{chat_id}/', params={'content': repr(time.perf_counter())}) for chat_id in chat_ids
+        ])
+    await asyncio.wait_for(asyncio.gather(*receivers), timeout=120)
+    elapsed = time.perf_counter() - start
+
+    print(f"connections: {len(consumers)}  messages delivered: {len(latencies)} in {elapsed:.2f}s")
+    if latencies:
+        print(f"delivery p50: {statistics.median(latencies) * 1000:.1f} ms  "
+              f"p95: {percentile(latencies, 95) * 1000:.1f} ms  p99: {percentile(latencies, 99) * 1000:.1f} ms")
+    for client in [supplier, *consumers]:
+        await client.aclose()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='WebSocket chat fan-out: N connections, message delivery latency')
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--connections', type=int, default=100)
+    parser.add_argument('--messages', type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,40 @@
+"""add hot query indexes
+
+Revision ID: 95b1b8922523
+Revises: 290dfcd07ad0
+Create Date: 2026-10-18 17:06:04.299337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '95b1b8922523'
+down_revision: Union[str, Sequence[str], None] = '290dfcd07ad0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_chats_consumer_id', 'chats', ['consumer_id'], unique=False)
+    op.create_index('ix_chats_supplier_id_consumer_id', 'chats', ['supplier_id', 'consumer_id'], unique=False)
+    op.create_index('ix_links_consumer_id_is_approved', 'links', ['consumer_id', 'is_approved'], unique=False)
+    op.create_index('ix_links_supplier_id_is_approved', 'links', ['supplier_id', 'is_approved'], unique=False)
+    op.create_index('ix_products_supplier_id_id', 'products', ['supplier_id', 'id'], unique=False)
+    op.create_index('ix_refreshtokens_user_id', 'refreshtokens', ['user_id'], unique=False)
+    op.create_index('ix_messages_chat_id_id', 'messages', ['chat_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chats_consumer_id', table_name='chats')
+    op.drop_index('ix_chats_supplier_id_consumer_id', table_name='chats')
+    op.drop_index('ix_links_consumer_id_is_approved', table_name='links')
+    op.drop_index('ix_links_supplier_id_is_approved', table_name='links')
+    op.drop_index('ix_products_supplier_id_id', table_name='products')
+    op.drop_index('ix_refreshtokens_user_id', table_name='refreshtokens')
+    op.drop_index('ix_messages_chat_id_id', table_name='messages')
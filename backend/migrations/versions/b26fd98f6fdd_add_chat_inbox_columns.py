@@ -0,0 +1,37 @@
+"""add chat inbox columns
+
+Revision ID: b26fd98f6fdd
+Revises: d7e0b6ba8dd1
+Create Date: 2026-10-18 17:52:40.106311
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b26fd98f6fdd'
+down_revision: Union[str, Sequence[str], None] = 'd7e0b6ba8dd1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('chats', sa.Column('supplier_last_read_id', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('chats', sa.Column('consumer_last_read_id', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('chats', sa.Column('last_message_id', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.execute('UPDATE chats SET last_message_id = coalesce((SELECT max(id) FROM messages WHERE messages.chat_id = chats.id), 0)')
+    op.create_index('ix_chats_supplier_id_last_message_id', 'chats', ['supplier_id', 'last_message_id', 'id'], unique=False)
+    op.create_index('ix_chats_consumer_id_last_message_id', 'chats', ['consumer_id', 'last_message_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_chats_consumer_id_last_message_id', table_name='chats')
+    op.drop_index('ix_chats_supplier_id_last_message_id', table_name='chats')
+    op.drop_column('chats', 'last_message_id')
+    op.drop_column('chats', 'consumer_last_read_id')
+    op.drop_column('chats', 'supplier_last_read_id')
@@ -0,0 +1,36 @@
+"""add product search indexes
+
+Revision ID: d7e0b6ba8dd1
+Revises: 95b1b8922523
+Create Date: 2026-10-18 17:40:12.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7e0b6ba8dd1'
+down_revision: Union[str, Sequence[str], None] = '95b1b8922523'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_products_supplier_id_price', 'products', ['supplier_id', 'price'], unique=False)
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index(
+            'ix_products_search_vector', 'products',
+            [sa.text("to_tsvector('simple'::regconfig, (name::text || ' '::text) || description::text)")],
+            unique=False, postgresql_using='gin',
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_using='gin')
+    op.drop_index('ix_products_supplier_id_price', table_name='products')
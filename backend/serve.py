@@ -0,0 +1,143 @@
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import signal
+import time
+
+import httpx
+import uvicorn
+from pydantic import EmailStr, TypeAdapter
+from sqlalchemy.orm import configure_mappers
+
+from app.config import get_broker_config, get_server_config
+from app.database import engines
+from app.main import app
+
+logger = logging.getLogger('uvicorn.error')
+
+MIN_WORKER_LIFETIME = 1.0
+SUPERVISOR_SIGNALS = {signal.SIGCHLD, signal.SIGINT, signal.SIGTERM}
+
+
+class Supervisor:
+    def __init__(self, config: uvicorn.Config, sock, workers: int, graceful_timeout: float):
+        self.config = config
+        self.socket = sock
+        self.workers = workers
+        self.graceful_timeout = graceful_timeout
+        self.children: dict[int, float] = {}
+
+    def spawn(self):
+        pid = os.fork()
+        if pid == 0:
+            signal.pthread_sigmask(signal.SIG_UNBLOCK, SUPERVISOR_SIGNALS)
+            for pool_engine in engines:
+                pool_engine.sync_engine.dispose(close=False)
+            code = 1
+            try:
+                uvicorn.Server(self.config).run(sockets=[self.socket])
+                code = 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception('worker %s crashed', os.getpid())
+            finally:
+                os._exit(code)
+        self.children[pid] = time.monotonic()
+        logger.info('started worker %s', pid)
+
+    def reap(self):
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            started = self.children.pop(pid, None)
+            if started is not None:
+                yield pid, status, started
+
+    def restart_exited(self):
+        for pid, status, started in self.reap():
+            logger.warning('worker %s exited with status %s, restarting', pid, os.waitstatus_to_exitcode(status))
+            if time.monotonic() - started < MIN_WORKER_LIFETIME:
+                time.sleep(MIN_WORKER_LIFETIME)
+            self.spawn()
+
+    def run(self):
+        signal.pthread_sigmask(signal.SIG_BLOCK, SUPERVISOR_SIGNALS)
+        for _ in range(self.workers):
+            self.spawn()
+        while signal.sigwaitinfo(SUPERVISOR_SIGNALS).si_signo == signal.SIGCHLD:
+            self.restart_exited()
+        self.drain()
+
+    def drain(self):
+        logger.info('draining %s workers', len(self.children))
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while True:
+            for _ in self.reap():
+                pass
+            remaining = deadline - time.monotonic()
+            if not self.children or remaining <= 0 or signal.sigtimedwait({signal.SIGCHLD}, remaining) is None:
+                break
+        for pid in self.children:
+            logger.warning('worker %s did not drain in time, killing', pid)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+
+async def prime_routes():
+    transport = httpx.ASGITransport(app=app.router)
+    async with httpx.AsyncClient(transport=transport, base_url='http://prefork') as client:
+        await client.get('/__prefork__')
+
+
+def prime_app():
+    configure_mappers()
+    asyncio.run(prime_routes())
+    TypeAdapter(EmailStr).validate_python('prefork@example.com')
+
+
+def main(args):
+    prime_app()
+    config = uvicorn.Config(
+        app,
+        host=args.host,
+        port=args.port,
+        loop=args.loop,
+        http=args.http,
+        backlog=args.backlog,
+        timeout_keep_alive=args.keepalive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        access_log=args.access_log,
+        proxy_headers=True,
+    )
+    config.load()
+    sock = config.bind_socket()
+    if args.workers > 1 and get_broker_config()['url'] is None:
+        logger.warning('chat events, logouts and link decisions are not shared between workers without CHAT_BROKER_URL')
+    gc.collect()
+    gc.freeze()
+    Supervisor(config, sock, args.workers, args.graceful_timeout).run()
+    sock.close()
+
+
+if __name__ == "__main__":
+    server_config = get_server_config()
+    parser = argparse.ArgumentParser(description='Run the API with pre-forked uvicorn workers')
+    parser.add_argument('--host', default=server_config['host'])
+    parser.add_argument('--port', type=int, default=server_config['port'])
+    parser.add_argument('--workers', type=int, default=server_config['workers'])
+    parser.add_argument('--backlog', type=int, default=server_config['backlog'])
+    parser.add_argument('--keepalive', type=int, default=server_config['keepalive'])
+    parser.add_argument('--graceful-timeout', type=float, default=server_config['graceful_timeout'])
+    parser.add_argument('--loop', default='uvloop', choices=['uvloop', 'asyncio', 'auto'])
+    parser.add_argument('--http', default='httptools', choices=['httptools', 'h11', 'auto'])
+    parser.add_argument('--access-log', action='store_true')
+    main(parser.parse_args())